@@ -1,151 +1,39 @@
+import os
 import streamlit as st
 from datetime import date, time, timedelta
-from math import sin, cos, tan, atan2, radians, degrees, floor, sqrt, fmod
-
-PI = 3.14159265358979323846
-RADEG = 180.0 / PI
-DEGRAD = PI / 180.0
-
-def rev(x):
-    return x - floor(x / 360.0) * 360.0
-
-def calculate_d(year, month, day, ut):
-    return 367 * year - floor(7 * (year + floor((month + 9) / 12)) / 4) + floor(275 * month / 9) + day - 730530 + ut / 24.0
-
-def calculate_oblecl(d):
-    return 23.4393 - 3.563E-7 * d
-
-def calculate_sun(d):
-    w = 282.9404 + 4.70935E-5 * d
-    e = 0.016709 - 1.151E-9 * d
-    M = rev(356.0470 + 0.9856002585 * d)
-    E = M + degrees(e * sin(radians(M)) * (1 + e * cos(radians(M))))
-    x = cos(radians(E)) - e
-    y = sin(radians(E)) * sqrt(1 - e**2)
-    r = sqrt(x**2 + y**2)
-    v = degrees(atan2(y, x))
-    lon = rev(v + w)
-    lat = 0
-    return lon, lat, r
-
-def calculate_moon(d):
-    N = rev(125.1228 - 0.0529538083 * d)
-    i = 5.1454
-    w = rev(318.0634 + 0.1643573223 * d)
-    e = 0.054900
-    M = rev(115.3654 + 13.0649929509 * d)
-    Msun = rev(356.0470 + 0.9856002585 * d)
-    Ls = rev(280.4665 + 0.98564736 * d)
-    Lm = rev(N + w + M)
-    D = rev(Lm - Ls)
-    F = rev(Lm - N)
-    lon = Lm + (-1.274 * sin(radians(M - 2*D)) + 0.658 * sin(radians(2*D)) - 0.186 * sin(radians(Msun)) - 0.059 * sin(radians(2*M - 2*D)) - 0.057 * sin(radians(M - 2*D + Msun)) + 0.053 * sin(radians(M + 2*D)) + 0.046 * sin(radians(2*D - Msun)) + 0.041 * sin(radians(M - Msun)) - 0.034 * sin(radians(D)) - 0.031 * sin(radians(M + Msun)) - 0.015 * sin(radians(2*F - 2*D)) - 0.011 * sin(radians(M - 4*D)))
-    lon = rev(lon)
-    lat = 5.128 * sin(radians(F)) + 0.281 * sin(radians(M + F)) + 0.278 * sin(radians(M - F)) + 0.173 * sin(radians(2*F - 2*D)) + 0.055 * sin(radians(M - D + F)) + 0.046 * sin(radians(M - D - F)) + 0.033 * sin(radians(D + F)) + 0.017 * sin(radians(2*M + F))
-    return lon, lat
-
-def get_planet_params(planet):
-    if planet == 'mercury':
-        return {'N': 48.3313, 'N1': 3.24587E-5, 'i': 7.0047, 'i1': 5.00E-8, 'w': 29.1241, 'w1': 1.01444E-5, 'a': 0.387098, 'e': 0.205635, 'e1': 5.59E-10, 'M': 168.6562, 'M1': 4.0923344368, 'pert': lambda mj, ms, mu, mn: 0}
-    elif planet == 'venus':
-        return {'N': 76.6799, 'N1': 2.46590E-5, 'i': 3.3946, 'i1': 2.75E-8, 'w': 54.8910, 'w1': 1.38374E-5, 'a': 0.723330, 'e': 0.006773, 'e1': -1.302E-9, 'M': 48.0052, 'M1': 1.6021302244, 'pert': lambda mj, ms, mu, mn: 0}
-    elif planet == 'mars':
-        return {'N': 49.5574, 'N1': 2.11081E-5, 'i': 1.8497, 'i1': -1.78E-8, 'w': 286.5016, 'w1': 2.92961E-5, 'a': 1.523688, 'e': 0.093405, 'e1': 2.516E-9, 'M': 18.6021, 'M1': 0.5240207766, 'pert': lambda mj, ms, mu, mn: 0}
-    elif planet == 'jupiter':
-        return {'N': 100.4542, 'N1': 2.76854E-5, 'i': 1.3030, 'i1': -1.557E-7, 'w': 273.8777, 'w1': 1.64505E-5, 'a': 5.20256, 'e': 0.048498, 'e1': 4.469E-9, 'M': 19.8950, 'M1': 0.0830853001, 'pert': lambda mj, ms, mu, mn: -0.332 * sin(radians(2*mj - 5*ms - 67.6)) - 0.056 * sin(radians(2*mj - 2*ms + 21)) + 0.042 * sin(radians(3*mj - 5*ms + 21)) - 0.036 * sin(radians(mj - 2*ms)) + 0.022 * cos(radians(mj - ms)) + 0.023 * sin(radians(2*mj - 3*ms + 52)) - 0.016 * sin(radians(mj - 5*ms - 69))}
-    elif planet == 'saturn':
-        return {'N': 113.6634, 'N1': 2.38980E-5, 'i': 2.4886, 'i1': -1.081E-7, 'w': 339.3939, 'w1': 2.97661E-5, 'a': 9.55475, 'e': 0.055546, 'e1': -9.499E-9, 'M': 316.9670, 'M1': 0.0334442282, 'pert': lambda mj, ms, mu, mn: 0.812 * sin(radians(2*mj - 5*ms - 67.6)) - 0.229 * cos(radians(2*mj - 4*ms - 2)) + 0.119 * sin(radians(mj - 2*ms - 3)) + 0.046 * sin(radians(2*mj - 6*ms - 69)) + 0.014 * sin(radians(mj - 3*ms + 32))}
-    elif planet == 'uranus':
-        return {'N': 74.0005, 'N1': 1.3978E-5, 'i': 0.7733, 'i1': 1.9E-8, 'w': 96.6612, 'w1': 3.0565E-5, 'a': 19.18171, 'e': 0.047318, 'e1': 7.45E-9, 'M': 142.5905, 'M1': 0.011725806, 'pert': lambda mj, ms, mu, mn: -0.0426 * sin(radians(ms - 2*mu + 6)) + 0.0313 * sin(radians(2*ms - 2*mu + 21)) - 0.0125 * sin(radians(ms - 2*mu - 8)) + 0.0111 * sin(radians(2*ms - 3*mu + 33)) - 0.0094 * sin(radians(ms - mu + 20))}
-    elif planet == 'neptune':
-        return {'N': 131.7806, 'N1': 3.0173E-5, 'i': 1.7700, 'i1': -2.55E-7, 'w': 272.8461, 'w1': -6.027E-6, 'a': 30.05826, 'e': 0.008606, 'e1': 2.15E-9, 'M': 260.2471, 'M1': 0.005995147, 'pert': lambda mj, ms, mu, mn: 0.030 * sin(radians(mu - 2*mn + 6)) + 0.011 * sin(radians(mu - mn + 35)) + 0.010 * sin(radians(mu - 3*mn + 33)) + 0.008 * sin(radians(mu - mn + 20))}
-    elif planet == 'pluto':
-        return {'N': 110.3035, 'N1': -0.01183482 / 36525, 'i': 17.14001, 'i1': 11.07E-6 / 36525, 'w': 224.0689, 'w1': -0.00008234 / 36525, 'a': 39.482116, 'e': 0.2488273, 'e1': 60.30E-6 / 36525, 'M': 238.92881, 'M1': 0.003076325, 'pert': lambda mj, ms, mu, mn: 0}
-
-def calculate_planet_position(d, planet, x_earth, y_earth, z_earth, mj, ms, mu, mn):
-    params = get_planet_params(planet)
-    N = params['N'] + params['N1'] * d
-    i = params['i'] + params['i1'] * d
-    w = params['w'] + params['w1'] * d
-    a = params['a']
-    e = params['e'] + params['e1'] * d
-    M = rev(params['M'] + params['M1'] * d)
-    pert = params['pert'](mj, ms, mu, mn)
-    M = rev(M + pert)
-    E = M
-    for _ in range(20):
-        delta = E - degrees(e * sin(radians(E))) - M
-        E -= delta / (1 - e * cos(radians(E)))
-        if abs(delta) < 0.0001:
-            break
-    xv = a * (cos(radians(E)) - e)
-    yv = a * sqrt(1 - e**2) * sin(radians(E))
-    r = sqrt(xv**2 + yv**2)
-    v = degrees(atan2(yv, xv))
-    vrad = radians(v + w)
-    Nr = radians(N)
-    ir = radians(i)
-    xh = r * (cos(Nr) * cos(vrad) - sin(Nr) * sin(vrad) * cos(ir))
-    yh = r * (sin(Nr) * cos(vrad) + cos(Nr) * sin(vrad) * cos(ir))
-    zh = r * sin(vrad) * sin(ir)
-    xg = xh + x_earth
-    yg = yh + y_earth
-    zg = zh + z_earth
-    lon = rev(degrees(atan2(yg, xg)))
-    lat = degrees(atan2(zg, sqrt(xg**2 + yg**2)))
-    return lon, lat, sqrt(xg**2 + yg**2 + zg**2)
-
-def calculate_north_node(d):
-    node = rev(125.04452 - 0.05295377 * d)
-    return node
-
-def calculate_ascendant(d, lat, lon_deg):
-    oblecl = calculate_oblecl(d)
-    t = d / 36525
-    gmst0 = rev(280.46061837 + 360.98564736629 * d + 0.000387933 * t**2 - t**3 / 38710000)
-    gmst = rev(gmst0 + lon_deg)
-    ramc = gmst
-    sin_e = sin(radians(oblecl))
-    cos_e = cos(radians(oblecl))
-    tan_gl = tan(radians(lat))
-    sin_ramc = sin(radians(ramc))
-    cos_ramc = cos(radians(ramc))
-    denominator = cos_ramc * cos_e - sin_e * tan_gl * sin_ramc
-    if denominator == 0:
-        denominator = 1e-10
-    asc_lon = degrees(atan2(sin_ramc, denominator))
-    if asc_lon < 0:
-        asc_lon += 360
-    asc_lon = fmod(asc_lon, 360)
-    return asc_lon
-
-def get_zodiac_sign(lon):
-    signs = ["Aries", "Taurus", "Gemini", "Cancer", "Leo", "Virgo", "Libra", "Scorpio", "Sagittarius", "Capricorn", "Aquarius", "Pisces"]
-    return signs[int(lon // 30)]
-
-def get_aspect(diff, orb=8):
-    aspects = {
-        0: "Conjunction 🔗",
-        60: "Sextile ✨",
-        90: "Square ⚔️",
-        120: "Trine 🌟",
-        180: "Opposition ↔️"
-    }
-    for angle in aspects:
-        if abs(diff - angle) <= orb or abs(diff - (360 - angle)) <= orb:
-            return aspects[angle]
-    return None
-
-def calculate_life_path(day, month, year):
-    def reduce(num):
-        while num > 9 and num not in [11, 22, 33]:
-            num = sum(int(d) for d in str(num))
-        return num
-    day_red = reduce(day)
-    month_red = reduce(month)
-    year_red = reduce(year)
-    total = reduce(day_red + month_red + year_red)
-    return total
+from soul_connections.astrology import connection_type, get_zodiac_sign, north_node_bond, starseed_indicators
+from soul_connections.cache import ChartCache
+from soul_connections.ephemeris import BODIES, calculate_bodies, calculate_d, calculate_positions
+from soul_connections.ephemeris_table import load_table
+from soul_connections.incremental import IncrementalMatch
+from soul_connections.numerology import is_harmonious_life_path, life_path_meaning
+from soul_connections.profiling import PROFILER, Profiler, use_profiler
+from soul_connections.search import d_to_datetime, date_range_d, find_connection_intervals
+from soul_connections.places import label, search_places
+from soul_connections.timezones import DEFAULT_TZ, TZ_OPTIONS, ut_hours
+
+@st.cache_resource
+def get_ephemeris():
+    table = load_table()
+    return (table.positions, table.bodies) if table is not None else (calculate_positions, calculate_bodies)
+
+@st.cache_resource
+def get_chart_cache():
+    return ChartCache(maxsize=int(os.environ.get("SOUL_CHART_CACHE_SIZE", 4096)), compute=get_ephemeris()[0])
+
+def get_incremental_match():
+    # Per session: the last charts and synastry, so a rerun only recomputes
+    # what the changed inputs affect.
+    if "incremental_match" not in st.session_state:
+        st.session_state["incremental_match"] = IncrementalMatch(get_chart_cache().positions, get_ephemeris()[1])
+    return st.session_state["incremental_match"]
+
+def get_profiler():
+    # Per session, so one user's checkbox and run breakdown never leak into
+    # another's; the timings still add up in the process-wide PROFILER.
+    if "profiler" not in st.session_state:
+        st.session_state["profiler"] = Profiler(parent=PROFILER)
+    return st.session_state["profiler"]
 
 st.title("New Age Spirituality Link Explorer 🌌✨")
 
@@ -220,170 +108,157 @@ col1, col2 = st.columns(2)
 
 default_date = date(1993, 7, 12)
 default_time = time(12, 26)
-default_tz = "IST (UTC+5:30)"
+default_tz = DEFAULT_TZ
 default_lat = 13.3159  # 13.3159° N
 default_lon = 75.7730  # 75.7730° E
 
-tz_options = [
-    "UTC (UTC+0:00)", 
-    "IST (UTC+5:30)",
-    "EST (UTC-5:00)",
-    "CST (UTC-6:00)",
-    "PST (UTC-8:00)",
-    "MST (UTC-7:00)",
-    "CET (UTC+1:00)",
-    "EET (UTC+2:00)",
-    "MSK (UTC+3:00)",
-    "GST (UTC+4:00)",
-    "PKT (UTC+5:00)",
-    "BST (UTC+6:00)",
-    "ICT (UTC+7:00)",
-    "CST (UTC+8:00)",  # China
-    "JST (UTC+9:00)",
-    "AEST (UTC+10:00)",
-    "BRT (UTC-3:00)",
-    "AST (UTC-4:00)",
-    "AKST (UTC-9:00)",
-    "HST (UTC-10:00)"
-]
-
-def get_tz_offset(tz_str):
-    if '(' not in tz_str:
-        return 0.0
-    offset_part = tz_str.split('(')[1].split(')')[0].replace('UTC', '')
-    sign = 1 if '+' in offset_part else -1
-    offset_str = offset_part.lstrip('+-')
-    parts = offset_str.split(':')
-    hours = float(parts[0])
-    minutes = float(parts[1]) if len(parts) > 1 else 0.0
-    return sign * (hours + minutes / 60)
+def use_place(person):
+    # Runs before the rerun builds the widgets, so their keys can still be set.
+    matches = search_places(st.session_state[f"place_query{person}"])
+    chosen = st.session_state.get(f"place{person}")
+    place = next((p for p in matches if label(p) == chosen), matches[0] if matches else None)
+    if place is not None:
+        st.session_state[f"lat{person}"] = place.lat
+        st.session_state[f"lon{person}"] = place.lon
+        st.session_state[f"tz{person}"] = place.zone
+
+def birth_inputs(person):
+    for name, value in (("tz", default_tz), ("lat", default_lat), ("lon", default_lon)):
+        st.session_state.setdefault(f"{name}{person}", value)
+    birth_date = st.date_input("Birth Date", value=default_date, key=f"date{person}", min_value=date(1900,1,1), max_value=date(2100,12,31))
+    birth_time = st.time_input("Birth Time (optional, default noon)", value=default_time, key=f"time{person}", step=timedelta(minutes=1))
+    query = st.text_input("Birth Place (search)", key=f"place_query{person}", on_change=use_place, args=(person,))
+    matches = search_places(query) if query else []
+    if matches:
+        st.selectbox("Matching places", options=[label(p) for p in matches], key=f"place{person}", on_change=use_place, args=(person,))
+    elif query:
+        st.caption("No matching place; enter the coordinates and timezone below.")
+    # The fixed options plus the zone of a chosen place, rather than every
+    # IANA zone, keep the widget small on each rerun.
+    zone = st.session_state[f"tz{person}"]
+    tz = st.selectbox("Timezone", options=TZ_OPTIONS if zone in TZ_OPTIONS else TZ_OPTIONS + [zone], key=f"tz{person}")
+    lat = st.number_input("Latitude (decimal degrees)", key=f"lat{person}")
+    lon = st.number_input("Longitude (decimal degrees)", key=f"lon{person}")
+    return birth_date, birth_time, tz, lat, lon
 
 with col1:
     st.subheader("Mystery")
-    date1 = st.date_input("Birth Date", value=default_date, key="date1", min_value=date(1900,1,1), max_value=date(2100,12,31))
-    time1 = st.time_input("Birth Time (optional, default noon)", value=default_time, key="time1", step=timedelta(minutes=1))
-    tz1 = st.selectbox("Timezone", options=tz_options, index=tz_options.index(default_tz), key="tz1")
-    lat1 = st.number_input("Latitude (decimal degrees)", value=default_lat, key="lat1")
-    lon1 = st.number_input("Longitude (decimal degrees)", value=default_lon, key="lon1")
+    date1, time1, tz1, lat1, lon1 = birth_inputs(1)
 
 with col2:
     st.subheader("Enigma")
-    date2 = st.date_input("Birth Date", value=default_date, key="date2", min_value=date(1900,1,1), max_value=date(2100,12,31))
-    time2 = st.time_input("Birth Time (optional, default noon)", value=default_time, key="time2", step=timedelta(minutes=1))
-    tz2 = st.selectbox("Timezone", options=tz_options, index=tz_options.index(default_tz), key="tz2")
-    lat2 = st.number_input("Latitude (decimal degrees)", value=default_lat, key="lat2")
-    lon2 = st.number_input("Longitude (decimal degrees)", value=default_lon, key="lon2")
+    date2, time2, tz2, lat2, lon2 = birth_inputs(2)
 
-offset1 = get_tz_offset(tz1)
-offset2 = get_tz_offset(tz2)
+# "Tables" sends each result section as one element; "Line by line" is the
+# original one-st.write-per-row layout.
+render_mode = st.sidebar.radio("Result layout", ["Tables", "Line by line"], key="render_mode")
+profiler = get_profiler()
+profiler.enabled = st.sidebar.checkbox("Profile match runs ⏱️", value=PROFILER.enabled, key="profile")
 
 if st.button("Match and Explore 🔍"):
-    ut1 = time1.hour + time1.minute / 60 - offset1
+    lap = profiler.start_run()
+    ut1 = ut_hours(date1, time1, tz1)
     d1 = calculate_d(date1.year, date1.month, date1.day, ut1)
-    ut2 = time2.hour + time2.minute / 60 - offset2
+    ut2 = ut_hours(date2, time2, tz2)
     d2 = calculate_d(date2.year, date2.month, date2.day, ut2)
-
-    mj1 = rev(19.8950 + 0.0830853001 * d1)
-    ms1 = rev(316.9670 + 0.0334442282 * d1)
-    mu1 = rev(142.5905 + 0.011725806 * d1)
-    mn1 = rev(260.2471 + 0.005995147 * d1)
-
-    sun_lon1, sun_lat1, sun_r1 = calculate_sun(d1)
-    x_earth1 = sun_r1 * cos(radians(sun_lon1)) * cos(radians(sun_lat1))
-    y_earth1 = sun_r1 * sin(radians(sun_lon1)) * cos(radians(sun_lat1))
-    z_earth1 = sun_r1 * sin(radians(sun_lat1))
-
-    positions1 = {}
-    positions1['sun'] = sun_lon1
-    moon_lon1, moon_lat1 = calculate_moon(d1)
-    positions1['moon'] = moon_lon1
-
-    for p in ['mercury', 'venus', 'mars', 'jupiter', 'saturn', 'uranus', 'neptune', 'pluto']:
-        lon, lat, r = calculate_planet_position(d1, p, x_earth1, y_earth1, z_earth1, mj1, ms1, mu1, mn1)
-        positions1[p] = lon
-
-    positions1['ascendant'] = calculate_ascendant(d1, lat1, lon1)
-    positions1['north_node'] = calculate_north_node(d1)
-
-    mj2 = rev(19.8950 + 0.0830853001 * d2)
-    ms2 = rev(316.9670 + 0.0334442282 * d2)
-    mu2 = rev(142.5905 + 0.011725806 * d2)
-    mn2 = rev(260.2471 + 0.005995147 * d2)
-
-    sun_lon2, sun_lat2, sun_r2 = calculate_sun(d2)
-    x_earth2 = sun_r2 * cos(radians(sun_lon2)) * cos(radians(sun_lat2))
-    y_earth2 = sun_r2 * sin(radians(sun_lon2)) * cos(radians(sun_lat2))
-    z_earth2 = sun_r2 * sin(radians(sun_lat2))
-
-    positions2 = {}
-    positions2['sun'] = sun_lon2
-    moon_lon2, moon_lat2 = calculate_moon(d2)
-    positions2['moon'] = moon_lon2
-
-    for p in ['mercury', 'venus', 'mars', 'jupiter', 'saturn', 'uranus', 'neptune', 'pluto']:
-        lon, lat, r = calculate_planet_position(d2, p, x_earth2, y_earth2, z_earth2, mj2, ms2, mu2, mn2)
-        positions2[p] = lon
-
-    positions2['ascendant'] = calculate_ascendant(d2, lat2, lon2)
-    positions2['north_node'] = calculate_north_node(d2)
-
-    lp1 = calculate_life_path(date1.day, date1.month, date1.year)
-    lp2 = calculate_life_path(date2.day, date2.month, date2.year)
-
-    st.subheader("Numerology Insights 🔢")
-    meanings = ['', 'Independence', 'Sensitivity', 'Creativity', 'Stability', 'Freedom', 'Harmony', 'Wisdom', 'Power', 'Humanitarianism']
-    st.write(f"Mystery Life Path: {lp1} 🌟 - Represents {meanings[lp1 % 9]}.")
-    st.write(f"Enigma Life Path: {lp2} 🌟 - Represents {meanings[lp2 % 9]}.")
-    if lp1 == lp2 or abs(lp1 - lp2) in [2, 4]:
-        st.write("Harmonious compatibility, suggesting soulmate or soul family ties! 👫")
-
-    st.subheader("Astrological Charts 📊")
-    st.write("**Mystery Positions:**")
-    for p, lon in positions1.items():
-        sign = get_zodiac_sign(lon)
-        deg = lon % 30
-        st.write(f"{p.capitalize()} in {sign} at {deg:.2f}° 🌌")
-
-    st.write("**Enigma Positions:**")
-    for p, lon in positions2.items():
-        sign = get_zodiac_sign(lon)
-        deg = lon % 30
-        st.write(f"{p.capitalize()} in {sign} at {deg:.2f}° 🌌")
-
-    st.subheader("Synastry Aspects Between Persons 🔄")
-    for p1 in positions1:
-        for p2 in positions2:
-            diff = min(abs(positions1[p1] - positions2[p2]), 360 - abs(positions1[p1] - positions2[p2]))
-            aspect = get_aspect(diff)
-            if aspect:
-                indication = 'intense mirror for twin flame' if 'Conjunction' in aspect or 'Opposition' in aspect else 'harmonious soulmate flow' if 'Trine' in aspect or 'Sextile' in aspect else 'karmic challenge' if 'Square' in aspect else ''
-                st.write(f"{p1.capitalize()} (Mystery) {aspect} {p2.capitalize()} (Enigma) with orb {diff:.2f}° 💫 - Indicates {indication}.")
-
-    st.subheader("Starseed Indicators 👽")
+    lap('calculate_d')
+
+    chart_cache = get_chart_cache()
+    match = get_incremental_match()
+    with use_profiler(profiler):
+        changed1, changed2 = match.update((date1, d1, lat1, lon1), (date2, d2, lat2, lon2))
+    positions1 = match.charts[0].positions()
+    positions2 = match.charts[1].positions()
+    lap('charts')
+
+    lp1 = match.charts[0].life_path
+    lp2 = match.charts[1].life_path
+    lap('numerology')
+
+    numerology_lines = [
+        f"Mystery Life Path: {lp1} 🌟 - Represents {life_path_meaning(lp1)}.",
+        f"Enigma Life Path: {lp2} 🌟 - Represents {life_path_meaning(lp2)}.",
+    ]
+    if is_harmonious_life_path(lp1, lp2):
+        numerology_lines.append("Harmonious compatibility, suggesting soulmate or soul family ties! 👫")
+    aspects = match.aspects()
+    lap('synastry')
+    starseed_lines = []
     for person, positions in [("Mystery", positions1), ("Enigma", positions2)]:
-        indicators = []
-        if 24 <= (positions.get('uranus', 0) % 30) <= 29:
-            indicators.append("Uranus in critical degrees - Possible Pleiadian origins 🌟")
-        if int(positions['sun'] // 30) in [3, 7, 11]:  # Water signs: Cancer, Scorpio, Pisces
-            indicators.append("Sun in water sign - Heightened sensitivity 🔮")
+        indicators = starseed_indicators(positions)
         if indicators:
-            st.write(f"{person} may have starseed traits: {', '.join(indicators)}")
+            starseed_lines.append(f"{person} may have starseed traits: {', '.join(indicators)}")
         else:
-            st.write(f"{person}: No strong starseed markers in chart.")
+            starseed_lines.append(f"{person}: No strong starseed markers in chart.")
+
+    if render_mode == "Tables":
+        st.subheader("Numerology Insights 🔢")
+        st.write("\n\n".join(numerology_lines))
+        lap('render.numerology')
+
+        st.subheader("Astrological Charts 📊")
+        st.dataframe([
+            {"Body": p.capitalize(),
+             "Mystery": f"{get_zodiac_sign(positions1[p])} {positions1[p] % 30:.2f}°",
+             "Enigma": f"{get_zodiac_sign(positions2[p])} {positions2[p] % 30:.2f}°"}
+            for p in BODIES
+        ], hide_index=True)
+        lap('render.charts')
+
+        st.subheader("Synastry Aspects Between Persons 🔄")
+        if aspects:
+            st.dataframe([
+                {"Mystery": p1.capitalize(), "Aspect": aspect, "Enigma": p2.capitalize(), "Orb": f"{diff:.2f}°", "Indicates": indication}
+                for p1, p2, aspect, diff, indication in aspects
+            ], hide_index=True)
+        lap('render.synastry')
+
+        st.subheader("Starseed Indicators 👽")
+        st.write("\n\n".join(starseed_lines))
+        lap('render.starseed')
+    else:
+        st.subheader("Numerology Insights 🔢")
+        for line in numerology_lines:
+            st.write(line)
+        lap('render.numerology')
+
+        st.subheader("Astrological Charts 📊")
+        st.write("**Mystery Positions:**")
+        for p, lon in positions1.items():
+            sign = get_zodiac_sign(lon)
+            deg = lon % 30
+            st.write(f"{p.capitalize()} in {sign} at {deg:.2f}° 🌌")
+
+        st.write("**Enigma Positions:**")
+        for p, lon in positions2.items():
+            sign = get_zodiac_sign(lon)
+            deg = lon % 30
+            st.write(f"{p.capitalize()} in {sign} at {deg:.2f}° 🌌")
+        lap('render.charts')
+
+        st.subheader("Synastry Aspects Between Persons 🔄")
+        for p1, p2, aspect, diff, indication in aspects:
+            st.write(f"{p1.capitalize()} (Mystery) {aspect} {p2.capitalize()} (Enigma) with orb {diff:.2f}° 💫 - Indicates {indication}.")
+        lap('render.synastry')
+
+        st.subheader("Starseed Indicators 👽")
+        for line in starseed_lines:
+            st.write(line)
+        lap('render.starseed')
 
     st.subheader("Connection Type Inference 🔗")
-    sun_diff = min(abs(positions1['sun'] - positions2['sun']), 360 - abs(positions1['sun'] - positions2['sun']))
-    if abs(sun_diff - 180) <= 8:
+    connection = connection_type(min(abs(positions1['sun'] - positions2['sun']), 360 - abs(positions1['sun'] - positions2['sun'])))
+    if connection == 'twin_flame':
         st.write("""
         Sun opposition - Classic twin flame mirror! 🔥🪞 Indicates deep transformation through reflection.
         Sun opposition in synastry is a hallmark of twin flame connections, where the Suns are 180 degrees apart, creating a powerful mirror effect that highlights opposites and fosters profound personal growth through reflection and balance. This aspect brings intense attraction and polarization, often leading to transformative experiences where each partner sees their shadow self in the other, prompting deep healing and evolution 🔥🪞. In twin flame dynamics, it symbolizes the divine masculine and feminine energies coming together to achieve wholeness, but it can also manifest as conflicts that serve as catalysts for spiritual awakening. Astrologers note that this opposition encourages empathy and understanding, turning differences into strengths for a shared higher purpose.
         """)
-    elif abs(sun_diff - 0) <= 8 or abs(sun_diff - 120) <= 8 or abs(sun_diff - 60) <= 8:
+    elif connection == 'soulmate':
         st.write("""
         Harmonious Sun aspect - Soulmate energy for support and growth. ❤️
         Harmonious Sun aspects, such as conjunctions (0°), trines (120°), or sextiles (60°), indicate soulmate energy characterized by natural compatibility, mutual support, and effortless growth ❤️🏡. These aspects suggest souls that resonate on a core level, providing encouragement and stability without the intense challenges of other connections. In soulmate relationships, they facilitate a sense of familiarity and joy, where partners inspire each other's self-expression and life path, often leading to long-term harmony and shared adventures. This energy is nurturing, promoting emotional security and creative collaboration, making it ideal for platonic or romantic bonds that feel like "coming home."
         """)
-    elif abs(sun_diff - 90) <= 8:
+    elif connection == 'karmic':
         st.write("""
         Sun square - Karmic lessons, potential catalyst for change. ⚔️
         Sun square aspects (90°) in synastry point to karmic lessons and dynamic tension that acts as a catalyst for change and personal development ⚔️🌱. This challenging aspect creates friction between egos and life directions, forcing partners to confront differences and grow through adversity. In karmic or soul family contexts, it represents unresolved past-life issues that need resolution, often manifesting as power struggles or motivational clashes that ultimately build resilience and wisdom. While it can feel obstructive initially, the square drives evolution, turning obstacles into opportunities for deeper understanding and transformation.
@@ -394,9 +269,55 @@ if st.button("Match and Explore 🔍"):
         A neutral connection, where no significant Sun aspects are present, suggests a bond that lacks immediate astrological intensity, inviting exploration through intuition and personal experiences rather than predefined cosmic indicators 🌿🧭. This doesn't diminish the potential for meaningful interaction; instead, it encourages relying on inner guidance, synchronicities, and real-world compatibility to uncover the relationship's purpose. In spiritual terms, neutral charts may indicate flexible, free-will-based connections where growth emerges organically, without the pressure of karmic mandates, allowing for authentic discovery and evolution based on present-moment choices.
         """)
 
-    nn_diff1 = min(abs(positions1['north_node'] - positions2['sun']), 360 - abs(positions1['north_node'] - positions2['sun']))
-    nn_diff2 = min(abs(positions2['north_node'] - positions1['sun']), 360 - abs(positions2['north_node'] - positions1['sun']))
-    if nn_diff1 <= 10 or nn_diff2 <= 10:
+    if north_node_bond(positions1, positions2):
         st.write("North Node conjunct Sun - Destined karmic or soul family bond! 👪")
+    lap('render.connection')
+
+    stats = chart_cache.stats()
+    st.sidebar.caption(f"Chart cache: {stats['hits']} hits, {stats['misses']} misses, {stats['size']}/{stats['maxsize']} charts")
+    st.sidebar.caption(f"Recomputed {len(changed1)} + {len(changed2)} of {2 * len(BODIES)} placements")
 
     st.write("These are based on astrological calculations. Remember, spirituality is personal and subjective. Balance with critical thinking. 🧠💖")
+    lap('render.footer')
+
+    if profiler.enabled:
+        breakdown = profiler.breakdown()
+        # ephemeris.* stages run inside "charts", so only top-level laps add up to the total.
+        total = sum(ms for name, ms in breakdown if not name.startswith('ephemeris.'))
+        st.sidebar.subheader("Last match run ⏱️")
+        st.sidebar.caption(f"{total:.1f} ms in total")
+        st.sidebar.dataframe([{"Stage": name, "ms": round(ms, 3), "%": round(100 * ms / total, 1) if total else 0.0} for name, ms in breakdown], hide_index=True)
+        if os.environ.get("SOUL_PROFILE_EXPORT"):
+            PROFILER.export_jsonl(os.environ["SOUL_PROFILE_EXPORT"], source="app")
+
+st.header("Find Compatible Birth Moments 🔭")
+st.write("Search a date range for birth moments whose chart would form the chosen connection with Mystery's chart.")
+
+search_modes = {
+    "Twin flame - Sun opposition 🔥🪞": "twin_flame",
+    "Soulmate - Sun conjunction, trine or sextile ❤️": "soulmate",
+    "Karmic - Sun square ⚔️": "karmic",
+    "North Node conjunct Sun 👪": "north_node",
+}
+scol1, scol2, scol3 = st.columns(3)
+with scol1:
+    search_mode = st.selectbox("Connection", options=list(search_modes), key="search_mode")
+with scol2:
+    search_start = st.date_input("From", value=date(1900,1,1), key="search_start", min_value=date(1900,1,1), max_value=date(2100,12,31))
+with scol3:
+    search_end = st.date_input("To", value=date(2100,12,31), key="search_end", min_value=date(1900,1,1), max_value=date(2100,12,31))
+
+if st.button("Search Birth Moments 🔭"):
+    ut1 = ut_hours(date1, time1, tz1)
+    d1 = calculate_d(date1.year, date1.month, date1.day, ut1)
+    positions1 = get_chart_cache().chart(d1, lat1, lon1)
+    d_start, d_end = date_range_d(search_start, search_end)
+    intervals = find_connection_intervals(positions1, search_modes[search_mode], d_start, d_end) if d_start < d_end else []
+    if intervals:
+        st.write(f"Found {len(intervals)} windows between {search_start} and {search_end} (times in UTC) ✨")
+        st.dataframe([
+            {"From (UTC)": d_to_datetime(start).strftime("%Y-%m-%d %H:%M"), "To (UTC)": d_to_datetime(end).strftime("%Y-%m-%d %H:%M"), "Days": round(end - start, 2)}
+            for start, end in intervals
+        ])
+    else:
+        st.write("No birth moments in this range form that connection. 🌿")
@@ -0,0 +1,121 @@
+"""Local load test for the match API.
+
+    python -m benchmarks.load_test --spawn                      # start a server, hammer it, stop it
+    python -m benchmarks.load_test --port 8765 -c 256 -n 20000  # against a running `python -m soul_connections serve`
+"""
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from soul_connections.server import DEFAULT_PORT
+
+def random_birth(rng):
+    return {
+        'date': f'{rng.integers(1920, 2010)}-{rng.integers(1, 13):02d}-{rng.integers(1, 29):02d}',
+        'time': f'{rng.integers(0, 24):02d}:{rng.integers(0, 60):02d}',
+        'lat': round(float(rng.uniform(-60, 60)), 4),
+        'lon': round(float(rng.uniform(-180, 180)), 4),
+    }
+
+def match_request(host, body):
+    return (f'POST /match HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n'
+            f'Content-Length: {len(body)}\r\n\r\n').encode() + body
+
+async def read_response(reader):
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while (line := await reader.readline()) not in (b'\r\n', b''):
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.lower() == 'content-length':
+            length = int(value)
+    return status, await reader.readexactly(length)
+
+async def client(host, port, bodies, latencies, statuses):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for body in bodies:
+            started = time.perf_counter()
+            writer.write(match_request(host, body))
+            await writer.drain()
+            status, _ = await read_response(reader)
+            statuses[status] = statuses.get(status, 0) + 1
+            if status == 200:
+                latencies.append(time.perf_counter() - started)
+    finally:
+        writer.close()
+
+async def fetch_metrics(host, port):
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(f'GET /metrics HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n\r\n'.encode())
+    _, data = await read_response(reader)
+    writer.close()
+    return json.loads(data)
+
+async def run(host, port, concurrency, requests, seed=7):
+    rng = np.random.default_rng(seed)
+    bodies = [json.dumps({'person1': random_birth(rng), 'person2': random_birth(rng)}).encode() for _ in range(requests)]
+    latencies, statuses = [], {}
+    started = time.perf_counter()
+    await asyncio.gather(*(client(host, port, bodies[k::concurrency], latencies, statuses) for k in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    p50, p99 = np.percentile(np.array(latencies) * 1000, [50, 99]).tolist() if latencies else (None, None)
+    return {
+        'requests': requests,
+        'concurrency': concurrency,
+        'seconds': elapsed,
+        'ok_per_second': len(latencies) / elapsed,
+        'statuses': statuses,
+        'client_latency_ms': {'p50': p50, 'p99': p99},
+        'server': await fetch_metrics(host, port),
+    }
+
+async def wait_until_up(host, port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            await fetch_metrics(host, port)
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.1)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('-c', '--concurrency', type=int, default=64, help="simultaneous keep-alive connections")
+    parser.add_argument('-n', '--requests', type=int, default=5000)
+    parser.add_argument('--spawn', action='store_true', help="start `python -m soul_connections serve` for the run")
+    parser.add_argument('--workers', type=int, default=1, help="server worker processes with --spawn")
+    parser.add_argument('-o', '--output', help="write the results as JSON")
+    args = parser.parse_args(argv)
+
+    process = None
+    if args.spawn:
+        process = subprocess.Popen([sys.executable, '-m', 'soul_connections', 'serve', '--host', args.host,
+                                    '--port', str(args.port), '--workers', str(args.workers)])
+    try:
+        if process is not None:
+            asyncio.run(wait_until_up(args.host, args.port))
+        report = asyncio.run(run(args.host, args.port, args.concurrency, args.requests))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+    latency = report['client_latency_ms']
+    print(f"{report['ok_per_second']:,.0f} matches/s over {report['seconds']:.2f}s, statuses {report['statuses']}")
+    print(f"client latency p50 {latency['p50']:.2f} ms, p99 {latency['p99']:.2f} ms; "
+          f"server mean batch {report['server']['mean_batch_size']:.1f}")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
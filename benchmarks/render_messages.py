@@ -0,0 +1,70 @@
+"""Streamlit messages and bytes sent by one "Match and Explore" click, per result layout.
+
+    python -m benchmarks.render_messages
+    python -m benchmarks.render_messages -o render.json
+"""
+import argparse
+import json
+import os
+import sys
+
+from streamlit.runtime.forward_msg_queue import ForwardMsgQueue
+from streamlit.testing.v1 import AppTest
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app.py')
+LAYOUTS = ["Line by line", "Tables"]
+
+def summarize(sent):
+    deltas = [msg for msg in sent if msg.WhichOneof('type') == 'delta']
+    return {
+        'messages': len(sent),
+        'delta_messages': len(deltas),
+        'bytes': sum(msg.ByteSize() for msg in sent),
+    }
+
+def recorded_run(at, action):
+    sent = []
+    enqueue = ForwardMsgQueue.enqueue
+
+    def recording(self, msg):
+        sent.append(msg)
+        enqueue(self, msg)
+
+    ForwardMsgQueue.enqueue = recording
+    try:
+        action(at).run()
+    finally:
+        ForwardMsgQueue.enqueue = enqueue
+    if at.exception:
+        raise RuntimeError(str(at.exception))
+    return summarize(sent)
+
+def measure(layout, app_path=APP_PATH):
+    # An idle rerun resends the page itself; the difference to a click is
+    # what the match results cost.
+    at = AppTest.from_file(app_path, default_timeout=60).run()
+    at.sidebar.radio(key="render_mode").set_value(layout).run()
+    idle = recorded_run(at, lambda at: at)
+    click = recorded_run(at, lambda at: at.button[0].click())
+    return {'page': click, 'results': {name: click[name] - idle[name] for name in click}}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-o', '--output', help="write the results as JSON")
+    args = parser.parse_args(argv)
+
+    results = {layout: measure(layout) for layout in LAYOUTS}
+    print(f"{'layout':<14} {'part':<8} {'messages':>9} {'deltas':>7} {'bytes':>9}")
+    for layout, result in results.items():
+        for part, counts in result.items():
+            print(f"{layout:<14} {part:<8} {counts['messages']:>9} {counts['delta_messages']:>7} {counts['bytes']:>9}")
+    before, after = (results[layout]['results'] for layout in LAYOUTS)
+    print(f"match results: {1 - after['delta_messages'] / before['delta_messages']:.0%} fewer delta messages, "
+          f"{1 - after['bytes'] / before['bytes']:.0%} fewer bytes")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
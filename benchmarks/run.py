@@ -0,0 +1,251 @@
+"""Benchmarks and accuracy regression checks for the ephemeris and synastry hot paths.
+
+    python -m benchmarks.run                     # check accuracy, then time everything
+    python -m benchmarks.run --quick -o out.json # smaller cohorts, save numbers for this release
+    python -m benchmarks.run --update-reference  # regenerate benchmarks/reference.json
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time as clock
+import timeit
+from datetime import date, time
+from math import cos, radians, sin
+
+import numpy as np
+
+from soul_connections.astrology import ASPECT_ANGLES, ASPECT_INDICATIONS, ASPECTS, get_aspect, separation, synastry_aspects, synastry_codes
+from soul_connections.ephemeris import (
+    BODIES, calculate_ascendant, calculate_moon, calculate_planet_position, calculate_positions, calculate_sun, rev,
+)
+from soul_connections.ephemeris_table import D_END, D_START, load_table
+from soul_connections.match import BirthRecord, match_batch
+from soul_connections.match_index import CONNECTION_WEIGHTS, INDICATION_CONNECTIONS, SUN_CONNECTION_ANGLES, MatchIndex
+from soul_connections.parallel import parallel_positions
+
+REFERENCE_PATH = os.path.join(os.path.dirname(__file__), 'reference.json')
+# The analytic engine must reproduce the stored longitudes to rounding error;
+# the interpolated table is allowed its build tolerance plus float32 storage.
+TOLERANCE = 1e-6
+TABLE_TOLERANCE = 0.0015
+ORB = 8
+N_CASES = 64
+
+def reference_cases(n=N_CASES, seed=20240712):
+    rng = np.random.default_rng(seed)
+    d = rng.uniform(D_START, D_END, n)
+    lat = rng.uniform(-66, 66, n)
+    lon = rng.uniform(-180, 180, n)
+    return d, lat, lon
+
+def aspect_list(lons1, lons2):
+    diffs, codes = synastry_codes(lons1, lons2, ORB)
+    return [[int(i), int(j), int(codes[i, j]), float(diffs[i, j])] for i, j in zip(*np.nonzero(codes))]
+
+def build_reference():
+    d, lat, lon = reference_cases()
+    lons = calculate_positions(d, lat, lon)
+    return {
+        'tolerance': TOLERANCE,
+        'orb': ORB,
+        'bodies': BODIES,
+        'cases': [[float(x) for x in row] for row in zip(d, lat, lon)],
+        'longitudes': lons.T.tolist(),
+        'aspects': [aspect_list(lons[:, k], lons[:, k + 1]) for k in range(0, len(d) - 1, 2)],
+    }
+
+def near_orb_edge(diff, tolerance):
+    return any(abs(abs(diff - angle) - ORB) <= tolerance for angle in ASPECT_ANGLES)
+
+def compare_aspects(expected, actual, tolerance):
+    # An aspect sitting within tolerance of its orb boundary may legitimately
+    # appear or disappear; anything else that differs is a regression.
+    expected = {(i, j): (code, diff) for i, j, code, diff in expected}
+    actual = {(i, j): (code, diff) for i, j, code, diff in actual}
+    problems = []
+    for key in expected.keys() | actual.keys():
+        want, got = expected.get(key), actual.get(key)
+        if want and got and want[0] == got[0]:
+            continue
+        diff = (want or got)[1]
+        if not near_orb_edge(diff, tolerance):
+            problems.append(f"{BODIES[key[0]]}/{BODIES[key[1]]}: expected {want}, got {got}")
+    return problems
+
+def check_accuracy(reference, compute, tolerance, label):
+    cases = np.array(reference['cases'])
+    expected = np.array(reference['longitudes']).T
+    lons = compute(cases[:, 0], cases[:, 1], cases[:, 2])
+    error = np.abs((lons - expected + 180) % 360 - 180)
+    failures = []
+    for k, body in enumerate(BODIES):
+        if error[k].max() > tolerance:
+            failures.append(f"{label}: {body} off by {error[k].max():.3g} degrees (tolerance {tolerance})")
+    for n, k in enumerate(range(0, len(cases) - 1, 2)):
+        for problem in compare_aspects(reference['aspects'][n], aspect_list(lons[:, k], lons[:, k + 1]), tolerance):
+            failures.append(f"{label}: case {k} aspect {problem}")
+    return {'label': label, 'max_error': float(error.max()), 'tolerance': tolerance, 'failures': failures}
+
+def scalar_chart(d, lat, lon):
+    mj = rev(19.8950 + 0.0830853001 * d)
+    ms = rev(316.9670 + 0.0334442282 * d)
+    mu = rev(142.5905 + 0.011725806 * d)
+    mn = rev(260.2471 + 0.005995147 * d)
+    sun_lon, sun_lat, sun_r = calculate_sun(d)
+    x_earth = sun_r * cos(radians(sun_lon))
+    y_earth = sun_r * sin(radians(sun_lon))
+    positions = {'sun': sun_lon, 'moon': calculate_moon(d)[0]}
+    for p in BODIES[2:10]:
+        positions[p] = calculate_planet_position(d, p, x_earth, y_earth, 0.0, mj, ms, mu, mn)[0]
+    positions['ascendant'] = calculate_ascendant(d, lat, lon)
+    positions['north_node'] = rev(125.04452 - 0.05295377 * d)
+    return positions
+
+def nested_synastry(positions1, positions2):
+    # The original per-pair loop from app.py, kept as the baseline it replaced.
+    aspects = []
+    for p1 in positions1:
+        for p2 in positions2:
+            diff = min(abs(positions1[p1] - positions2[p2]), 360 - abs(positions1[p1] - positions2[p2]))
+            aspect = get_aspect(diff)
+            if aspect:
+                aspects.append((p1, p2, aspect, diff))
+    return aspects
+
+def brute_force_scores(query, positions, connection=None):
+    # Every stored chart scored with the nested get_aspect loop, plus the
+    # rows whose Sun-Sun aspect makes them eligible for connection.
+    weights = {ASPECTS[angle]: CONNECTION_WEIGHTS[INDICATION_CONNECTIONS[ASPECT_INDICATIONS[angle]]] for angle in ASPECT_ANGLES}
+    scores = np.array([sum(weights[aspect] for _, _, aspect, _ in nested_synastry(query, dict(zip(BODIES, row)))) for row in positions])
+    rows = range(len(positions))
+    if connection is not None:
+        allowed = {ASPECTS[angle] for angle in SUN_CONNECTION_ANGLES[connection]}
+        rows = [r for r in rows if get_aspect(separation(query['sun'], positions[r][BODIES.index('sun')])) in allowed]
+    return scores, list(rows)
+
+def check_match_index(n=1000, queries=6, seed=20240713):
+    """MatchIndex scores, candidates and top-k against brute_force_scores.
+
+    Random longitudes are uniform, so ties in the integer-valued scores are
+    common while exact orb-edge separations are not.
+    """
+    rng = np.random.default_rng(seed)
+    positions = rng.uniform(0, 360, (n, len(BODIES)))
+    index = MatchIndex(positions, orb=ORB)
+    failures = []
+    max_error = 0.0
+    for q in range(queries):
+        lons = rng.uniform(0, 360, len(BODIES))
+        query = dict(zip(BODIES, lons.tolist()))
+        for connection in [None, *SUN_CONNECTION_ANGLES]:
+            expected, rows = brute_force_scores(query, positions, connection)
+            if connection is None:
+                got = index.scores(lons)
+            else:
+                candidates = index.candidates(lons, connection)
+                if np.sort(candidates).tolist() != rows:
+                    failures.append(f"MatchIndex: query {q} {connection} candidates differ")
+                got = index.row_scores(lons, np.array(rows, dtype=np.int64))
+            max_error = max(max_error, float(np.abs(got - expected[rows]).max(initial=0)))
+            for k in (1, 5, len(rows)):
+                want = sorted(rows, key=lambda r: (-expected[r], r))[:k]
+                top = index.top_k(lons, k, connection)
+                if [row_id for row_id, _ in top] != want or [score for _, score in top] != expected[want].tolist():
+                    failures.append(f"MatchIndex: query {q} top_k(k={k}, connection={connection}) differs")
+    return {'label': 'MatchIndex', 'max_error': max_error, 'tolerance': 0, 'unit': '', 'failures': failures}
+
+def per_call(fn, repeat=5):
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+def run_benchmarks(cohort_size):
+    d, lat, lon = 5000.25, 13.3159, 75.7730
+    sun_lon, _, sun_r = calculate_sun(d)
+    x_earth, y_earth = sun_r * cos(radians(sun_lon)), sun_r * sin(radians(sun_lon))
+    mj, ms, mu, mn = 10.0, 20.0, 30.0, 40.0
+    positions1 = scalar_chart(d, lat, lon)
+    positions2 = scalar_chart(-7300.6, 40.7, -74.0)
+    table = load_table()
+    rng = np.random.default_rng(1)
+    cohort_d = rng.uniform(D_START, D_END, cohort_size)
+    cohort_lat = rng.uniform(-60, 60, cohort_size)
+    cohort_lon = rng.uniform(-180, 180, cohort_size)
+    birth1 = BirthRecord(date(1993, 7, 12), time(12, 26), "IST (UTC+5:30)", 13.3159, 75.7730)
+    birth2 = BirthRecord(date(1990, 1, 5), time(8, 0), "EST (UTC-5:00)", 40.7, -74.0)
+    pairs = [(birth1, birth2)] * min(cohort_size, 2000)
+
+    results = {}
+
+    def bench(name, fn, items=1, **kwargs):
+        seconds = per_call(fn, **kwargs)
+        results[name] = {'seconds_per_call': seconds, 'items_per_call': items, 'items_per_second': items / seconds}
+
+    bench('calculate_sun', lambda: calculate_sun(d))
+    bench('calculate_moon', lambda: calculate_moon(d))
+    bench('calculate_planet_position[jupiter]', lambda: calculate_planet_position(d, 'jupiter', x_earth, y_earth, 0.0, mj, ms, mu, mn))
+    bench('calculate_planet_position[mercury]', lambda: calculate_planet_position(d, 'mercury', x_earth, y_earth, 0.0, mj, ms, mu, mn))
+    bench('calculate_ascendant', lambda: calculate_ascendant(d, lat, lon))
+    bench('synastry[nested get_aspect loop]', lambda: nested_synastry(positions1, positions2))
+    bench('synastry[synastry_aspects]', lambda: synastry_aspects(positions1, positions2))
+    bench('two_charts+synastry[scalar]', lambda: synastry_aspects(scalar_chart(d, lat, lon), scalar_chart(-7300.6, 40.7, -74.0)))
+    bench('two_charts+synastry[batch]', lambda: synastry_aspects(*(dict(zip(BODIES, c)) for c in calculate_positions([d, -7300.6], [lat, 40.7], [lon, -74.0]).T.tolist())))
+    bench('cohort[calculate_positions]', lambda: calculate_positions(cohort_d, cohort_lat, cohort_lon), items=cohort_size, repeat=3)
+    if table is not None:
+        bench('cohort[EphemerisTable.positions]', lambda: table.positions(cohort_d, cohort_lat, cohort_lon), items=cohort_size, repeat=3)
+    bench(f'cohort[parallel_positions x{os.cpu_count()}]', lambda: parallel_positions(cohort_d, cohort_lat, cohort_lon), items=cohort_size, repeat=3)
+    lons = calculate_positions(cohort_d, cohort_lat, cohort_lon).T
+    half = cohort_size // 2
+    bench('cohort[synastry_codes]', lambda: synastry_codes(lons[:half], lons[half:2 * half]), items=half, repeat=3)
+    bench('cohort[match_batch]', lambda: match_batch(pairs), items=len(pairs), repeat=3)
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--update-reference', action='store_true', help="regenerate the stored reference longitudes and aspects")
+    parser.add_argument('--check-only', action='store_true', help="run the accuracy checks without timing anything")
+    parser.add_argument('--quick', action='store_true', help="use a 10k cohort instead of 100k")
+    parser.add_argument('-o', '--output', help="write the results as JSON for comparison across releases")
+    args = parser.parse_args(argv)
+
+    if args.update_reference:
+        with open(REFERENCE_PATH, 'w') as f:
+            json.dump(build_reference(), f)
+        print(f"wrote {REFERENCE_PATH}")
+        return 0
+
+    with open(REFERENCE_PATH) as f:
+        reference = json.load(f)
+    checks = [check_accuracy(reference, calculate_positions, reference['tolerance'], 'calculate_positions')]
+    table = load_table()
+    if table is not None:
+        checks.append(check_accuracy(reference, table.positions, TABLE_TOLERANCE, 'EphemerisTable'))
+    checks.append(check_match_index())
+    failed = False
+    for check in checks:
+        status = 'FAIL' if check['failures'] else 'ok'
+        print(f"accuracy {check['label']:<22} max error {check['max_error']:.3g}{check.get('unit', '°')} (tolerance {check['tolerance']}) {status}")
+        for failure in check['failures']:
+            print(f"  {failure}")
+        failed = failed or bool(check['failures'])
+
+    report = {
+        'timestamp': clock.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': sys.version.split()[0],
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'accuracy': checks,
+    }
+    if not args.check_only:
+        report['benchmarks'] = run_benchmarks(10_000 if args.quick else 100_000)
+        for name, result in report['benchmarks'].items():
+            print(f"{name:<38} {result['seconds_per_call'] * 1e6:>12.2f} µs/call {result['items_per_second']:>14,.0f} items/s")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,20 @@
+from soul_connections.astrology import (
+    ASPECTS, ZODIAC_SIGNS, connection_type, get_aspect, get_zodiac_sign, north_node_bond, starseed_indicators,
+    synastry_aspects,
+)
+from soul_connections.cache import ChartCache
+from soul_connections.chart_store import ChartStore, create_store, open_store
+from soul_connections.cohort import cohort_aspects, iter_cohort_aspects
+from soul_connections.ephemeris import BODIES, PLANETS, calculate_bodies, calculate_d, calculate_positions
+from soul_connections.ephemeris_table import EphemerisTable, load_table
+from soul_connections.match import BirthRecord, birth_d, match_batch, parse_birth
+from soul_connections.match_index import MatchIndex
+from soul_connections.parallel import parallel_positions
+from soul_connections.profiling import PROFILER, Profiler, stage, use_profiler
+from soul_connections.numerology import calculate_life_path, is_harmonious_life_path, life_path_meaning
+from soul_connections.places import Place, PlaceIndex, load_places, search_places
+from soul_connections.timezones import DEFAULT_TZ, TZ_OPTIONS, get_tz_offset, ut_hours, utc_offset, zone_info, zone_offset
+from soul_connections.incremental import IncrementalChart, IncrementalMatch
+from soul_connections.search import d_to_datetime, find_aspect_intervals, find_connection_intervals
+from soul_connections.server import MatchServer
+from soul_connections.soul_family import SoulFamilyGraph
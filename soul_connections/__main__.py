@@ -0,0 +1,3 @@
+from soul_connections.cli import main
+
+main()
@@ -0,0 +1,93 @@
+import numpy as np
+
+ZODIAC_SIGNS = ["Aries", "Taurus", "Gemini", "Cancer", "Leo", "Virgo", "Libra", "Scorpio", "Sagittarius", "Capricorn", "Aquarius", "Pisces"]
+
+ASPECTS = {
+    0: "Conjunction 🔗",
+    60: "Sextile ✨",
+    90: "Square ⚔️",
+    120: "Trine 🌟",
+    180: "Opposition ↔️"
+}
+# Numeric aspect codes: 0 means no aspect, k means ASPECT_ANGLES[k - 1].
+ASPECT_ANGLES = list(ASPECTS)
+ASPECT_NAMES = [ASPECTS[angle].split()[0] for angle in ASPECT_ANGLES]
+ASPECT_INDICATIONS = {
+    0: 'intense mirror for twin flame',
+    60: 'harmonious soulmate flow',
+    90: 'karmic challenge',
+    120: 'harmonious soulmate flow',
+    180: 'intense mirror for twin flame',
+}
+
+def get_zodiac_sign(lon):
+    return ZODIAC_SIGNS[int(lon // 30)]
+
+def get_aspect(diff, orb=8):
+    for angle in ASPECTS:
+        if abs(diff - angle) <= orb or abs(diff - (360 - angle)) <= orb:
+            return ASPECTS[angle]
+    return None
+
+def separation(lon1, lon2):
+    delta = np.abs(np.asarray(lon1) - np.asarray(lon2))
+    return np.minimum(delta, 360 - delta)
+
+# Aspect code for each multiple of 30 degrees from 0 to 180.
+NEAREST_30_CODES = np.array([1, 0, 2, 3, 4, 0, 5], dtype=np.uint8)
+
+def aspect_codes(diff, orb=8):
+    diff = np.asarray(diff, dtype=float)
+    if orb < 15 and diff.size and 0 <= diff.min() and diff.max() <= 180:
+        # Separations in [0, 180] with orbs under half the 30 degree spacing:
+        # only the nearest multiple of 30 can be within orb, so one pass and a
+        # lookup give the same answer as checking every aspect in order.
+        nearest = np.rint(diff / 30)
+        codes = NEAREST_30_CODES[nearest.astype(np.intp)]
+        codes[np.abs(diff - nearest * 30) > orb] = 0
+        return codes
+    codes = np.zeros(diff.shape, dtype=np.uint8)
+    for code, angle in enumerate(ASPECT_ANGLES, start=1):
+        within = (np.abs(diff - angle) <= orb) | (np.abs(diff - (360 - angle)) <= orb)
+        codes[(codes == 0) & within] = code
+    return codes
+
+def synastry_codes(lons1, lons2, orb=8):
+    """Separations and aspect codes for every body pair, shape (..., bodies1, bodies2)."""
+    lons1 = np.asarray(lons1, dtype=float)
+    lons2 = np.asarray(lons2, dtype=float)
+    diffs = separation(lons1[..., :, None], lons2[..., None, :])
+    return diffs, aspect_codes(diffs, orb)
+
+def aspect_list(names1, names2, diffs, codes):
+    aspects = []
+    for i, j in zip(*np.nonzero(codes)):
+        angle = ASPECT_ANGLES[codes[i, j] - 1]
+        aspects.append((names1[i], names2[j], ASPECTS[angle], float(diffs[i, j]), ASPECT_INDICATIONS[angle]))
+    return aspects
+
+def synastry_aspects(positions1, positions2, orb=8):
+    diffs, codes = synastry_codes(list(positions1.values()), list(positions2.values()), orb)
+    return aspect_list(list(positions1), list(positions2), diffs, codes)
+
+def connection_type(sun_diff, orb=8):
+    if abs(sun_diff - 180) <= orb:
+        return 'twin_flame'
+    elif abs(sun_diff - 0) <= orb or abs(sun_diff - 120) <= orb or abs(sun_diff - 60) <= orb:
+        return 'soulmate'
+    elif abs(sun_diff - 90) <= orb:
+        return 'karmic'
+    return 'neutral'
+
+def north_node_bond(positions1, positions2, orb=10):
+    nn_diff1 = separation(positions1['north_node'], positions2['sun'])
+    nn_diff2 = separation(positions2['north_node'], positions1['sun'])
+    return bool(nn_diff1 <= orb or nn_diff2 <= orb)
+
+def starseed_indicators(positions):
+    indicators = []
+    if 24 <= (positions.get('uranus', 0) % 30) <= 29:
+        indicators.append("Uranus in critical degrees - Possible Pleiadian origins 🌟")
+    if int(positions['sun'] // 30) in [3, 7, 11]:  # Water signs: Cancer, Scorpio, Pisces
+        indicators.append("Sun in water sign - Heightened sensitivity 🔮")
+    return indicators
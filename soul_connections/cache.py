@@ -0,0 +1,80 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from soul_connections.ephemeris import BODIES, calculate_positions
+
+# calculate_d is only ever fed whole minutes, so one second is well below the
+# resolution of any real input; coordinates are quantized to ~0.1 m.
+D_QUANTUM = 1 / 86400
+COORD_QUANTUM = 1e-6
+
+class ChartCache:
+    """Thread-safe LRU of computed charts keyed on quantized (d, lat, lon)."""
+
+    def __init__(self, maxsize=4096, d_quantum=D_QUANTUM, coord_quantum=COORD_QUANTUM, compute=calculate_positions):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self.d_quantum = d_quantum
+        self.coord_quantum = coord_quantum
+        self.compute = compute
+        self._charts = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key(self, d, lat, lon):
+        return (round(d / self.d_quantum), round(lat / self.coord_quantum), round(lon / self.coord_quantum))
+
+    def positions(self, d, lat, lon):
+        d = np.atleast_1d(np.asarray(d, dtype=float))
+        lat = np.broadcast_to(np.asarray(lat, dtype=float), d.shape)
+        lon = np.broadcast_to(np.asarray(lon, dtype=float), d.shape)
+        keys = [self.key(*row) for row in zip(d.tolist(), lat.tolist(), lon.tolist())]
+        out = np.empty((len(BODIES), d.size))
+        missing = OrderedDict()
+        with self._lock:
+            for k, key in enumerate(keys):
+                chart = self._charts.get(key)
+                if chart is None:
+                    missing.setdefault(key, []).append(k)
+                else:
+                    self._charts.move_to_end(key)
+                    out[:, k] = chart
+            self.hits += d.size - len(missing)
+            self.misses += len(missing)
+        if missing:
+            first = [rows[0] for rows in missing.values()]
+            computed = self.compute(d[first], lat[first], lon[first])
+            with self._lock:
+                for (key, rows), column in zip(missing.items(), computed.T):
+                    out[:, rows] = column[:, None]
+                    self._charts[key] = tuple(column.tolist())
+                    self._charts.move_to_end(key)
+                while len(self._charts) > self.maxsize:
+                    self._charts.popitem(last=False)
+                    self.evictions += 1
+        return out
+
+    def chart(self, d, lat, lon):
+        return dict(zip(BODIES, self.positions(d, lat, lon)[:, 0].tolist()))
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._charts),
+                'maxsize': self.maxsize,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._charts.clear()
+            self.hits = self.misses = self.evictions = 0
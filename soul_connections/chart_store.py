@@ -0,0 +1,124 @@
+import json
+import os
+
+import numpy as np
+
+from soul_connections.ephemeris import BODIES
+
+META = 'meta.json'
+VERSION = 1
+# Longitude encodings: float32 (~1e-5 degree steps) or uint16 fractions of a
+# full circle (360 / 65536 ~ 0.0055 degree steps), both little-endian.
+ENCODINGS = {'float32': '<f4', 'uint16': '<u2'}
+UINT16_SCALE = 65536 / 360
+# Per-chart metadata columns next to the body longitudes.
+META_COLUMNS = {'id': '<i8', 'd': '<f8', 'lat': '<f4', 'lon': '<f4', 'life_path': 'u1'}
+
+def column_path(path, name):
+    return os.path.join(path, f'{name}.bin')
+
+def encode_longitudes(lons, encoding):
+    lons = np.asarray(lons, dtype=float) % 360
+    if encoding == 'uint16':
+        return (np.rint(lons * UINT16_SCALE).astype(np.int64) % 65536).astype(ENCODINGS[encoding])
+    return lons.astype(ENCODINGS[encoding])
+
+def decode_longitudes(values, encoding):
+    if encoding == 'uint16':
+        return values / UINT16_SCALE
+    return values.astype(float)
+
+def create_store(path, encoding='float32', bodies=BODIES):
+    if encoding not in ENCODINGS:
+        raise ValueError(f"encoding must be one of {sorted(ENCODINGS)}")
+    os.makedirs(path, exist_ok=True)
+    if os.path.exists(os.path.join(path, META)):
+        raise FileExistsError(f"{path} already holds a chart store")
+    columns = {**{body: ENCODINGS[encoding] for body in bodies}, **META_COLUMNS}
+    for name in columns:
+        open(column_path(path, name), 'wb').close()
+    write_meta(path, {'version': VERSION, 'encoding': encoding, 'bodies': list(bodies), 'columns': columns, 'count': 0})
+    return ChartStore(path)
+
+def write_meta(path, meta):
+    tmp = os.path.join(path, META + '.tmp')
+    with open(tmp, 'w') as f:
+        json.dump(meta, f)
+    os.replace(tmp, os.path.join(path, META))
+
+class ChartStore:
+    """Directory of fixed-width little-endian columns, one file per column.
+
+    Every stored body gets a longitude column in the store's encoding;
+    id, d, lat, lon and life_path sit alongside.  meta.json holds the row
+    count and is replaced only after the columns are written, so readers
+    never see a half-appended chart and a failed append is cut off on the
+    next one.  Reads are memory-mapped views; nothing is copied until a
+    float conversion is asked for.
+    """
+
+    def __init__(self, path):
+        with open(os.path.join(path, META)) as f:
+            meta = json.load(f)
+        if meta.get('version') != VERSION:
+            raise ValueError(f"{path} has unsupported chart store version {meta.get('version')}")
+        self.path = path
+        self.meta = meta
+        self.encoding = meta['encoding']
+        self.bodies = meta['bodies']
+        self.columns = {name: np.dtype(dtype) for name, dtype in meta['columns'].items()}
+
+    def __len__(self):
+        return self.meta['count']
+
+    def column(self, name):
+        """Read-only view of one stored column, encoded as stored."""
+        dtype = self.columns[name]
+        if not len(self):
+            return np.empty(0, dtype=dtype)
+        return np.memmap(column_path(self.path, name), dtype=dtype, mode='r', shape=(len(self),))
+
+    def longitudes(self, body):
+        return decode_longitudes(self.column(body), self.encoding)
+
+    def positions(self, rows=None):
+        """(N, len(bodies)) float longitudes, decoding only the selected rows."""
+        columns = [self.column(body) if rows is None else self.column(body)[rows] for body in self.bodies]
+        return np.stack([decode_longitudes(column, self.encoding) for column in columns], axis=-1)
+
+    def append(self, positions, life_paths, d, lat, lon, ids=None):
+        """Append charts given as (N, len(bodies)) longitudes plus their metadata.
+
+        ids are integers and default to the row numbers; returns the new rows.
+        """
+        positions = np.asarray(positions, dtype=float).reshape(-1, len(self.bodies))
+        n = len(positions)
+        start = len(self)
+        if ids is not None and np.asarray(ids).dtype.kind not in 'iu':
+            raise ValueError(f"chart store ids must be integers, got {np.asarray(ids).dtype} values")
+        values = {body: encode_longitudes(positions[:, k], self.encoding) for k, body in enumerate(self.bodies)}
+        values.update(
+            id=np.arange(start, start + n) if ids is None else ids,
+            d=d, lat=lat, lon=lon, life_path=life_paths,
+        )
+        for name, dtype in self.columns.items():
+            column = np.broadcast_to(np.asarray(values[name]).astype(dtype), (n,))
+            with open(column_path(self.path, name), 'r+b') as f:
+                # Drop anything an interrupted append left past the last row.
+                f.truncate(start * dtype.itemsize)
+                f.seek(start * dtype.itemsize)
+                f.write(column.tobytes())
+        self.meta = {**self.meta, 'count': start + n}
+        write_meta(self.path, self.meta)
+        return np.arange(start, start + n)
+
+def open_store(path, encoding=None):
+    """The chart store at path, created empty (float32 unless encoding says
+    otherwise) if it does not exist yet.  An existing store keeps its own
+    encoding; asking for a different one is an error."""
+    if os.path.exists(os.path.join(path, META)):
+        store = ChartStore(path)
+        if encoding is not None and encoding != store.encoding:
+            raise ValueError(f"{path} is a {store.encoding} chart store, not {encoding}")
+        return store
+    return create_store(path, encoding or 'float32')
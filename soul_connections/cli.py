@@ -0,0 +1,238 @@
+import argparse
+import asyncio
+import csv
+import io
+import json
+import os
+import sys
+
+import numpy as np
+
+from soul_connections import server
+from soul_connections.chart_store import ENCODINGS, ChartStore, open_store
+from soul_connections.cohort import DEFAULT_MEMORY_CAP, cohort_aspects
+from soul_connections.ephemeris import calculate_positions
+from soul_connections.ephemeris_table import load_table
+from soul_connections.match import birth_d, match_batch, parse_birth
+from soul_connections.numerology import calculate_life_path
+from soul_connections.parallel import DEFAULT_CHUNK_SIZE, parallel_positions
+from soul_connections.profiling import PROFILER
+from soul_connections.soul_family import SoulFamilyGraph
+
+BIRTH_FIELDS = ['date', 'time', 'tz', 'lat', 'lon']
+
+def open_input(path):
+    if path == '-':
+        return io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8', newline='')
+    return open(path, encoding='utf-8', newline='')
+
+def open_output(path):
+    if path == '-':
+        return io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', newline='\n')
+    return open(path, 'w', encoding='utf-8', newline='\n')
+
+def input_format(path, fmt):
+    if fmt:
+        return fmt
+    return 'csv' if path.lower().endswith('.csv') else 'jsonl'
+
+def iter_rows(stream, fmt):
+    """CSV rows as dicts, JSONL rows as undecoded lines; decode_row() turns
+    either into a dict so a bad line fails on its own."""
+    if fmt == 'csv':
+        yield from csv.DictReader(stream)
+    else:
+        for line in stream:
+            if line.strip():
+                yield line
+
+def decode_row(row):
+    if isinstance(row, str):
+        row = json.loads(row)
+    if not isinstance(row, dict):
+        raise TypeError(f"expected an object per row, got {type(row).__name__}")
+    return row
+
+def pair_from_row(row):
+    if 'person1' in row:
+        return parse_birth(row['person1']), parse_birth(row['person2'])
+    return tuple(parse_birth({field: row.get(f'{field}{k}') for field in BIRTH_FIELDS}) for k in (1, 2))
+
+def match_stream(rows, compute=calculate_positions, chunk_size=1024):
+    """Yield one result per input row, holding at most chunk_size rows in memory."""
+    pending = []
+
+    def flush():
+        pairs = [pair for _, pair, _ in pending if pair is not None]
+        results = iter(match_batch(pairs, compute))
+        for row_id, pair, error in pending:
+            result = {'error': error} if pair is None else next(results)
+            yield {'id': row_id, **result}
+        pending.clear()
+
+    for line_no, row in enumerate(rows, start=1):
+        row_id = line_no
+        try:
+            row = decode_row(row)
+            row_id = row.get('id', line_no)
+            pending.append((row_id, pair_from_row(row), None))
+        except (KeyError, TypeError, ValueError) as exc:
+            pending.append((row_id, None, f"{type(exc).__name__}: {exc}"))
+        if len(pending) >= chunk_size:
+            yield from flush()
+    yield from flush()
+
+def run_match(args):
+    table = None if args.no_table else load_table()
+    compute = table.positions if table is not None else calculate_positions
+    with open_input(args.input) as inp, open_output(args.output) as out:
+        rows = iter_rows(inp, input_format(args.input, args.format))
+        for result in match_stream(rows, compute, args.chunk_size):
+            out.write(json.dumps(result, ensure_ascii=False))
+            out.write('\n')
+
+def read_births(path, fmt):
+    with open_input(path) as inp:
+        rows = [decode_row(row) for row in iter_rows(inp, input_format(path, fmt))]
+    return [row.get('id', line_no) for line_no, row in enumerate(rows, start=1)], [parse_birth(row) for row in rows]
+
+def integer_ids(ids):
+    """Record ids as int64 for a chart store's id column; anything that is not
+    an integer (or an integer string, as CSV gives) is rejected."""
+    values = []
+    for row_id in ids:
+        text = str(row_id).strip()
+        if isinstance(row_id, bool) or not isinstance(row_id, (int, str)) or not text.lstrip('-').isdigit():
+            raise ValueError(f"chart store ids must be integers, got {row_id!r}")
+        values.append(int(text))
+    return np.array(values, dtype=np.int64)
+
+def birth_positions(births, compute):
+    return compute([birth_d(b) for b in births], [b.lat for b in births], [b.lon for b in births]).T
+
+def cohort_positions(path, fmt, compute):
+    return birth_positions(read_births(path, fmt)[1], compute)
+
+def run_cohort(args):
+    table = None if args.no_table else load_table()
+    compute = table.positions if table is not None else calculate_positions
+    lons_a = cohort_positions(args.cohort_a, args.format, compute)
+    lons_b = cohort_positions(args.cohort_b, args.format, compute)
+    manifest = cohort_aspects(lons_a, lons_b, args.output, args.memory_cap_mb * 2**20, args.workers, args.orb)
+    print(f"{manifest['count']} aspects across {len(manifest['tiles'])} tiles written to {args.output}")
+
+def run_charts(args):
+    table = None if args.no_table else load_table()
+    ids, births = read_births(args.input, args.format)
+    if args.store:
+        # Checked before any chart is computed, so a bad id or a mismatched
+        # encoding fails fast.
+        ids = integer_ids(ids)
+        store = open_store(args.output, args.encoding)
+
+    def progress(done, total):
+        print(f"\r{done}/{total} charts", end='', file=sys.stderr, flush=True)
+
+    d = [birth_d(b) for b in births]
+    lat = [b.lat for b in births]
+    lon = [b.lon for b in births]
+    positions = parallel_positions(d, lat, lon, args.workers, args.chunk_size, table, progress)
+    print(file=sys.stderr)
+    if args.store:
+        life_paths = [calculate_life_path(b.date.day, b.date.month, b.date.year) for b in births]
+        store.append(positions, life_paths, d, lat, lon, ids)
+    else:
+        np.save(args.output, positions)
+
+def run_families(args):
+    graph = SoulFamilyGraph(neighbours=args.neighbours, max_links=args.max_links)
+    if os.path.isdir(args.input):
+        store = ChartStore(args.input)
+        ids = store.column('id').tolist()
+        graph.add(store.positions(), store.column('life_path'))
+    else:
+        table = None if args.no_table else load_table()
+        compute = table.positions if table is not None else calculate_positions
+        ids, births = read_births(args.input, args.format)
+        graph.add(birth_positions(births, compute), [calculate_life_path(b.date.day, b.date.month, b.date.year) for b in births])
+    with open_output(args.output) as out:
+        for family, members in enumerate(graph.families(args.min_size)):
+            out.write(json.dumps({'family': family, 'size': len(members), 'members': [ids[m] for m in members.tolist()]}, ensure_ascii=False))
+            out.write('\n')
+
+def run_serve(args):
+    table = None if args.no_table else load_table()
+    options = dict(workers=args.workers, batch_size=args.batch_size, max_delay=args.max_delay_ms / 1000, max_pending=args.max_pending, table=table)
+    asyncio.run(server.serve(args.host, args.port, **options))
+
+def run_build_table(args):
+    from soul_connections import ephemeris_table
+    ephemeris_table.main([args.path] if args.path else [])
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m soul_connections', description="Soul connection batch tools.")
+    parser.add_argument('--profile', metavar='JSONL', help="time each stage and append counters and histograms to this file (this process only)")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    match = commands.add_parser('match', help="match pairs of birth records from CSV/JSONL into JSONL results")
+    match.add_argument('input', nargs='?', default='-', help="CSV or JSONL file of pairs, '-' for stdin")
+    match.add_argument('-o', '--output', default='-', help="JSONL output file, '-' for stdout")
+    match.add_argument('--format', choices=['csv', 'jsonl'], help="input format (default: from the file extension)")
+    match.add_argument('--chunk-size', type=int, default=1024, help="pairs computed per vectorized batch")
+    match.add_argument('--no-table', action='store_true', help="always solve the ephemeris instead of using the table")
+    match.set_defaults(run=run_match)
+
+    cohort = commands.add_parser('cohort', help="write the sparse aspect matrix between two cohorts of birth records")
+    cohort.add_argument('cohort_a', help="CSV or JSONL file of birth records (date, time, tz, lat, lon)")
+    cohort.add_argument('cohort_b')
+    cohort.add_argument('-o', '--output', required=True, help="directory for the part files and manifest.json")
+    cohort.add_argument('--format', choices=['csv', 'jsonl'], help="input format (default: from the file extension)")
+    cohort.add_argument('--memory-cap-mb', type=int, default=DEFAULT_MEMORY_CAP // 2**20, help="approximate memory budget across all workers")
+    cohort.add_argument('--workers', type=int, help="worker processes (default: all cores)")
+    cohort.add_argument('--orb', type=float, default=8)
+    cohort.add_argument('--no-table', action='store_true', help="always solve the ephemeris instead of using the table")
+    cohort.set_defaults(run=run_cohort)
+
+    charts = commands.add_parser('charts', help="compute the longitudes of every birth record on all cores into a .npy array")
+    charts.add_argument('input', nargs='?', default='-', help="CSV or JSONL file of birth records, '-' for stdin")
+    charts.add_argument('-o', '--output', required=True, help=".npy file of shape (records, bodies), or a chart store directory with --store")
+    charts.add_argument('--store', action='store_true', help="append the charts, life paths and birth data to a chart store (record ids, or line numbers, must be integers)")
+    charts.add_argument('--encoding', choices=sorted(ENCODINGS), help="longitude encoding of a new chart store (default: float32); must match an existing one")
+    charts.add_argument('--format', choices=['csv', 'jsonl'], help="input format (default: from the file extension)")
+    charts.add_argument('--workers', type=int, help="worker processes (default: all cores)")
+    charts.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="charts per task")
+    charts.add_argument('--no-table', action='store_true', help="always solve the ephemeris instead of using the table")
+    charts.set_defaults(run=run_charts)
+
+    families = commands.add_parser('families', help="group birth records into soul families, one JSONL line per family")
+    families.add_argument('input', nargs='?', default='-', help="CSV or JSONL file of birth records, a chart store directory, or '-' for stdin")
+    families.add_argument('-o', '--output', default='-', help="JSONL output file, '-' for stdout")
+    families.add_argument('--format', choices=['csv', 'jsonl'], help="input format (default: from the file extension)")
+    families.add_argument('--min-size', type=int, default=2, help="smallest family to report")
+    families.add_argument('--neighbours', type=int, default=4, help="closest charts inspected on each side of an aspect point")
+    families.add_argument('--max-links', type=int, default=16, help="strongest links kept per user")
+    families.add_argument('--no-table', action='store_true', help="always solve the ephemeris instead of using the table")
+    families.set_defaults(run=run_families)
+
+    serve = commands.add_parser('serve', help="run the local HTTP match API (POST /match, GET /metrics)")
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=server.DEFAULT_PORT)
+    serve.add_argument('--workers', type=int, default=1, help="worker processes computing batches")
+    serve.add_argument('--batch-size', type=int, default=64, help="most requests computed in one vectorized batch")
+    serve.add_argument('--max-delay-ms', type=float, default=2, help="how long a batch waits for more requests")
+    serve.add_argument('--max-pending', type=int, default=1024, help="queued requests before answering 503")
+    serve.add_argument('--no-table', action='store_true', help="always solve the ephemeris instead of using the table")
+    serve.set_defaults(run=run_serve)
+
+    build = commands.add_parser('build-table', help="write the precomputed ephemeris table")
+    build.add_argument('path', nargs='?')
+    build.set_defaults(run=run_build_table)
+
+    args = parser.parse_args(argv)
+    if args.profile:
+        PROFILER.enabled = True
+    try:
+        args.run(args)
+    finally:
+        if args.profile:
+            PROFILER.export_jsonl(args.profile, source=f'cli.{args.command}')
@@ -0,0 +1,105 @@
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from soul_connections.astrology import aspect_codes, separation
+from soul_connections.ephemeris import BODIES
+
+# One record per (person a, person b, body a, body b) within orb; code is an
+# astrology.ASPECT_ANGLES code (1-based, 0 never stored).
+RECORD_DTYPE = np.dtype([('i', '<u4'), ('j', '<u4'), ('body1', 'u1'), ('body2', 'u1'), ('code', 'u1'), ('separation', '<f4')])
+MANIFEST = 'manifest.json'
+DEFAULT_MEMORY_CAP = 512 * 2**20
+# Peak bytes per person pair while one body pair of a tile is in flight: the
+# float64 separations and their temporaries plus the records written from it.
+BYTES_PER_PAIR = 64 + RECORD_DTYPE.itemsize
+
+_tile_state = {}
+
+def tile_size(n_a, n_b, memory_cap=DEFAULT_MEMORY_CAP, workers=1):
+    pairs = max(memory_cap // (workers * BYTES_PER_PAIR), 1)
+    side = max(int(pairs ** 0.5), 1)
+    # Sides of at least one keep the tiling step nonzero, so an empty cohort
+    # just has no tiles.
+    tile_a = max(min(n_a, side), 1)
+    tile_b = max(min(n_b, pairs // tile_a), 1)
+    return tile_a, tile_b
+
+def part_path(out_dir, tile):
+    return os.path.join(out_dir, f'part-{tile:06d}.bin')
+
+def write_tile(lons_a, lons_b, i0, j0, path, orb=8, bodies1=None, bodies2=None):
+    bodies1 = range(lons_a.shape[1]) if bodies1 is None else bodies1
+    bodies2 = range(lons_b.shape[1]) if bodies2 is None else bodies2
+    count = 0
+    with open(path, 'wb') as f:
+        for b1 in bodies1:
+            for b2 in bodies2:
+                diffs = separation(lons_a[:, b1, None], lons_b[None, :, b2])
+                codes = aspect_codes(diffs, orb)
+                rows, cols = np.nonzero(codes)
+                records = np.empty(len(rows), dtype=RECORD_DTYPE)
+                records['i'] = rows + i0
+                records['j'] = cols + j0
+                records['body1'] = b1
+                records['body2'] = b2
+                records['code'] = codes[rows, cols]
+                records['separation'] = diffs[rows, cols]
+                f.write(records.tobytes())
+                count += len(records)
+    return count
+
+def _init_worker(lons_a, lons_b, orb, bodies1, bodies2):
+    _tile_state.update(lons_a=lons_a, lons_b=lons_b, orb=orb, bodies1=bodies1, bodies2=bodies2)
+
+def _run_tile(i0, i1, j0, j1, path):
+    s = _tile_state
+    return write_tile(s['lons_a'][i0:i1], s['lons_b'][j0:j1], i0, j0, path, s['orb'], s['bodies1'], s['bodies2'])
+
+def cohort_aspects(lons_a, lons_b, out_dir, memory_cap=DEFAULT_MEMORY_CAP, workers=None, orb=8, bodies1=None, bodies2=None):
+    """Write every within-orb (person, person, body, body) aspect between two cohorts.
+
+    lons_a and lons_b are (N, len(BODIES)) longitude arrays.  The A x B matrix
+    is cut into tiles sized so each worker stays under its share of
+    memory_cap; every tile streams its records to its own part file in
+    out_dir, described by manifest.json.  Returns the manifest.
+    """
+    lons_a = np.ascontiguousarray(lons_a, dtype=float)
+    lons_b = np.ascontiguousarray(lons_b, dtype=float)
+    workers = workers or os.cpu_count() or 1
+    tile_a, tile_b = tile_size(len(lons_a), len(lons_b), memory_cap, workers)
+    tiles = [(i0, min(i0 + tile_a, len(lons_a)), j0, min(j0 + tile_b, len(lons_b)))
+             for i0 in range(0, len(lons_a), tile_a) for j0 in range(0, len(lons_b), tile_b)]
+    os.makedirs(out_dir, exist_ok=True)
+    paths = [part_path(out_dir, k) for k in range(len(tiles))]
+    if workers == 1:
+        counts = [write_tile(lons_a[i0:i1], lons_b[j0:j1], i0, j0, path, orb, bodies1, bodies2)
+                  for (i0, i1, j0, j1), path in zip(tiles, paths)]
+    else:
+        initargs = (lons_a, lons_b, orb, bodies1, bodies2)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=initargs) as pool:
+            futures = [pool.submit(_run_tile, *tile, path) for tile, path in zip(tiles, paths)]
+            counts = [future.result() for future in futures]
+    manifest = {
+        'dtype': RECORD_DTYPE.descr,
+        'bodies': BODIES,
+        'orb': orb,
+        'size_a': len(lons_a),
+        'size_b': len(lons_b),
+        'tiles': [{'part': os.path.basename(path), 'rows': [i0, i1], 'cols': [j0, j1], 'count': count}
+                  for (i0, i1, j0, j1), path, count in zip(tiles, paths, counts)],
+        'count': sum(counts),
+    }
+    with open(os.path.join(out_dir, MANIFEST), 'w') as f:
+        json.dump(manifest, f)
+    return manifest
+
+def iter_cohort_aspects(out_dir):
+    """Memory-mapped record arrays, one per tile, in tile order."""
+    with open(os.path.join(out_dir, MANIFEST)) as f:
+        manifest = json.load(f)
+    for tile in manifest['tiles']:
+        if tile['count']:
+            yield np.memmap(os.path.join(out_dir, tile['part']), dtype=RECORD_DTYPE, mode='r', shape=(tile['count'],))
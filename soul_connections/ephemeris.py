@@ -0,0 +1,198 @@
+import numpy as np
+from math import floor
+from numpy import sin, cos, radians
+
+from soul_connections.profiling import stage
+
+PI = 3.14159265358979323846
+RADEG = 180.0 / PI
+DEGRAD = PI / 180.0
+
+PLANETS = ['mercury', 'venus', 'mars', 'jupiter', 'saturn', 'uranus', 'neptune', 'pluto']
+BODIES = ['sun', 'moon'] + PLANETS + ['ascendant', 'north_node']
+KEPLER_STAGES = {p: f'ephemeris.kepler.{p}' for p in PLANETS}
+
+def rev(x):
+    return x - floor(x / 360.0) * 360.0
+
+def rev_batch(x):
+    return x - np.floor(x / 360.0) * 360.0
+
+def calculate_d(year, month, day, ut):
+    return 367 * year - floor(7 * (year + floor((month + 9) / 12)) / 4) + floor(275 * month / 9) + day - 730530 + ut / 24.0
+
+def calculate_oblecl(d):
+    return 23.4393 - 3.563E-7 * d
+
+def calculate_sun_batch(d):
+    d = np.asarray(d, dtype=float)
+    w = 282.9404 + 4.70935E-5 * d
+    e = 0.016709 - 1.151E-9 * d
+    M = rev_batch(356.0470 + 0.9856002585 * d)
+    E = M + np.degrees(e * np.sin(np.radians(M)) * (1 + e * np.cos(np.radians(M))))
+    x = np.cos(np.radians(E)) - e
+    y = np.sin(np.radians(E)) * np.sqrt(1 - e**2)
+    r = np.sqrt(x**2 + y**2)
+    v = np.degrees(np.arctan2(y, x))
+    lon = rev_batch(v + w)
+    lat = np.zeros_like(lon)
+    return lon, lat, r
+
+def calculate_sun(d):
+    lon, lat, r = calculate_sun_batch(d)
+    return float(lon), 0, float(r)
+
+def calculate_moon_batch(d):
+    d = np.asarray(d, dtype=float)
+    N = rev_batch(125.1228 - 0.0529538083 * d)
+    w = rev_batch(318.0634 + 0.1643573223 * d)
+    M = rev_batch(115.3654 + 13.0649929509 * d)
+    Msun = rev_batch(356.0470 + 0.9856002585 * d)
+    Ls = rev_batch(280.4665 + 0.98564736 * d)
+    Lm = rev_batch(N + w + M)
+    D = rev_batch(Lm - Ls)
+    F = rev_batch(Lm - N)
+    lon = Lm + (-1.274 * sin(radians(M - 2*D)) + 0.658 * sin(radians(2*D)) - 0.186 * sin(radians(Msun)) - 0.059 * sin(radians(2*M - 2*D)) - 0.057 * sin(radians(M - 2*D + Msun)) + 0.053 * sin(radians(M + 2*D)) + 0.046 * sin(radians(2*D - Msun)) + 0.041 * sin(radians(M - Msun)) - 0.034 * sin(radians(D)) - 0.031 * sin(radians(M + Msun)) - 0.015 * sin(radians(2*F - 2*D)) - 0.011 * sin(radians(M - 4*D)))
+    lon = rev_batch(lon)
+    lat = 5.128 * sin(radians(F)) + 0.281 * sin(radians(M + F)) + 0.278 * sin(radians(M - F)) + 0.173 * sin(radians(2*F - 2*D)) + 0.055 * sin(radians(M - D + F)) + 0.046 * sin(radians(M - D - F)) + 0.033 * sin(radians(D + F)) + 0.017 * sin(radians(2*M + F))
+    return lon, lat
+
+def calculate_moon(d):
+    lon, lat = calculate_moon_batch(d)
+    return float(lon), float(lat)
+
+PLANET_PARAMS = {
+    'mercury': {'N': 48.3313, 'N1': 3.24587E-5, 'i': 7.0047, 'i1': 5.00E-8, 'w': 29.1241, 'w1': 1.01444E-5, 'a': 0.387098, 'e': 0.205635, 'e1': 5.59E-10, 'M': 168.6562, 'M1': 4.0923344368, 'pert': lambda mj, ms, mu, mn: 0},
+    'venus': {'N': 76.6799, 'N1': 2.46590E-5, 'i': 3.3946, 'i1': 2.75E-8, 'w': 54.8910, 'w1': 1.38374E-5, 'a': 0.723330, 'e': 0.006773, 'e1': -1.302E-9, 'M': 48.0052, 'M1': 1.6021302244, 'pert': lambda mj, ms, mu, mn: 0},
+    'mars': {'N': 49.5574, 'N1': 2.11081E-5, 'i': 1.8497, 'i1': -1.78E-8, 'w': 286.5016, 'w1': 2.92961E-5, 'a': 1.523688, 'e': 0.093405, 'e1': 2.516E-9, 'M': 18.6021, 'M1': 0.5240207766, 'pert': lambda mj, ms, mu, mn: 0},
+    'jupiter': {'N': 100.4542, 'N1': 2.76854E-5, 'i': 1.3030, 'i1': -1.557E-7, 'w': 273.8777, 'w1': 1.64505E-5, 'a': 5.20256, 'e': 0.048498, 'e1': 4.469E-9, 'M': 19.8950, 'M1': 0.0830853001, 'pert': lambda mj, ms, mu, mn: -0.332 * sin(radians(2*mj - 5*ms - 67.6)) - 0.056 * sin(radians(2*mj - 2*ms + 21)) + 0.042 * sin(radians(3*mj - 5*ms + 21)) - 0.036 * sin(radians(mj - 2*ms)) + 0.022 * cos(radians(mj - ms)) + 0.023 * sin(radians(2*mj - 3*ms + 52)) - 0.016 * sin(radians(mj - 5*ms - 69))},
+    'saturn': {'N': 113.6634, 'N1': 2.38980E-5, 'i': 2.4886, 'i1': -1.081E-7, 'w': 339.3939, 'w1': 2.97661E-5, 'a': 9.55475, 'e': 0.055546, 'e1': -9.499E-9, 'M': 316.9670, 'M1': 0.0334442282, 'pert': lambda mj, ms, mu, mn: 0.812 * sin(radians(2*mj - 5*ms - 67.6)) - 0.229 * cos(radians(2*mj - 4*ms - 2)) + 0.119 * sin(radians(mj - 2*ms - 3)) + 0.046 * sin(radians(2*mj - 6*ms - 69)) + 0.014 * sin(radians(mj - 3*ms + 32))},
+    'uranus': {'N': 74.0005, 'N1': 1.3978E-5, 'i': 0.7733, 'i1': 1.9E-8, 'w': 96.6612, 'w1': 3.0565E-5, 'a': 19.18171, 'e': 0.047318, 'e1': 7.45E-9, 'M': 142.5905, 'M1': 0.011725806, 'pert': lambda mj, ms, mu, mn: -0.0426 * sin(radians(ms - 2*mu + 6)) + 0.0313 * sin(radians(2*ms - 2*mu + 21)) - 0.0125 * sin(radians(ms - 2*mu - 8)) + 0.0111 * sin(radians(2*ms - 3*mu + 33)) - 0.0094 * sin(radians(ms - mu + 20))},
+    'neptune': {'N': 131.7806, 'N1': 3.0173E-5, 'i': 1.7700, 'i1': -2.55E-7, 'w': 272.8461, 'w1': -6.027E-6, 'a': 30.05826, 'e': 0.008606, 'e1': 2.15E-9, 'M': 260.2471, 'M1': 0.005995147, 'pert': lambda mj, ms, mu, mn: 0.030 * sin(radians(mu - 2*mn + 6)) + 0.011 * sin(radians(mu - mn + 35)) + 0.010 * sin(radians(mu - 3*mn + 33)) + 0.008 * sin(radians(mu - mn + 20))},
+    'pluto': {'N': 110.3035, 'N1': -0.01183482 / 36525, 'i': 17.14001, 'i1': 11.07E-6 / 36525, 'w': 224.0689, 'w1': -0.00008234 / 36525, 'a': 39.482116, 'e': 0.2488273, 'e1': 60.30E-6 / 36525, 'M': 238.92881, 'M1': 0.003076325, 'pert': lambda mj, ms, mu, mn: 0},
+}
+
+def get_planet_params(planet):
+    return PLANET_PARAMS[planet]
+
+def calculate_mean_anomalies_batch(d):
+    d = np.asarray(d, dtype=float)
+    mj = rev_batch(19.8950 + 0.0830853001 * d)
+    ms = rev_batch(316.9670 + 0.0334442282 * d)
+    mu = rev_batch(142.5905 + 0.011725806 * d)
+    mn = rev_batch(260.2471 + 0.005995147 * d)
+    return mj, ms, mu, mn
+
+def calculate_earth_batch(sun_lon, sun_lat, sun_r):
+    x_earth = sun_r * np.cos(np.radians(sun_lon)) * np.cos(np.radians(sun_lat))
+    y_earth = sun_r * np.sin(np.radians(sun_lon)) * np.cos(np.radians(sun_lat))
+    z_earth = sun_r * np.sin(np.radians(sun_lat))
+    return x_earth, y_earth, z_earth
+
+def solve_kepler_batch(M, e):
+    # Same Newton iteration as the scalar solver, but each row stops updating
+    # on the iteration where it would have broken out of the loop.
+    E = np.array(M, dtype=float)
+    active = np.ones(E.shape, dtype=bool)
+    for _ in range(20):
+        delta = E - np.degrees(e * np.sin(np.radians(E))) - M
+        E = np.where(active, E - delta / (1 - e * np.cos(np.radians(E))), E)
+        active &= np.abs(delta) >= 0.0001
+        if not active.any():
+            break
+    return E
+
+def calculate_planet_position_batch(d, planet, x_earth, y_earth, z_earth, mj, ms, mu, mn):
+    d = np.asarray(d, dtype=float)
+    params = get_planet_params(planet)
+    N = params['N'] + params['N1'] * d
+    i = params['i'] + params['i1'] * d
+    w = params['w'] + params['w1'] * d
+    a = params['a']
+    e = params['e'] + params['e1'] * d
+    M = rev_batch(params['M'] + params['M1'] * d)
+    pert = params['pert'](mj, ms, mu, mn)
+    M = rev_batch(M + pert)
+    E = solve_kepler_batch(M, e)
+    xv = a * (np.cos(np.radians(E)) - e)
+    yv = a * np.sqrt(1 - e**2) * np.sin(np.radians(E))
+    r = np.sqrt(xv**2 + yv**2)
+    v = np.degrees(np.arctan2(yv, xv))
+    vrad = np.radians(v + w)
+    Nr = np.radians(N)
+    ir = np.radians(i)
+    xh = r * (np.cos(Nr) * np.cos(vrad) - np.sin(Nr) * np.sin(vrad) * np.cos(ir))
+    yh = r * (np.sin(Nr) * np.cos(vrad) + np.cos(Nr) * np.sin(vrad) * np.cos(ir))
+    zh = r * np.sin(vrad) * np.sin(ir)
+    xg = xh + x_earth
+    yg = yh + y_earth
+    zg = zh + z_earth
+    lon = rev_batch(np.degrees(np.arctan2(yg, xg)))
+    lat = np.degrees(np.arctan2(zg, np.sqrt(xg**2 + yg**2)))
+    return lon, lat, np.sqrt(xg**2 + yg**2 + zg**2)
+
+def calculate_planet_position(d, planet, x_earth, y_earth, z_earth, mj, ms, mu, mn):
+    lon, lat, r = calculate_planet_position_batch(d, planet, x_earth, y_earth, z_earth, mj, ms, mu, mn)
+    return float(lon), float(lat), float(r)
+
+def calculate_north_node_batch(d):
+    return rev_batch(125.04452 - 0.05295377 * np.asarray(d, dtype=float))
+
+def calculate_north_node(d):
+    node = rev(125.04452 - 0.05295377 * d)
+    return node
+
+def calculate_ascendant_batch(d, lat, lon_deg):
+    d = np.asarray(d, dtype=float)
+    oblecl = calculate_oblecl(d)
+    t = d / 36525
+    gmst0 = rev_batch(280.46061837 + 360.98564736629 * d + 0.000387933 * t**2 - t**3 / 38710000)
+    gmst = rev_batch(gmst0 + np.asarray(lon_deg, dtype=float))
+    ramc = gmst
+    sin_e = np.sin(np.radians(oblecl))
+    cos_e = np.cos(np.radians(oblecl))
+    tan_gl = np.tan(np.radians(np.asarray(lat, dtype=float)))
+    sin_ramc = np.sin(np.radians(ramc))
+    cos_ramc = np.cos(np.radians(ramc))
+    denominator = cos_ramc * cos_e - sin_e * tan_gl * sin_ramc
+    denominator = np.where(denominator == 0, 1e-10, denominator)
+    asc_lon = np.degrees(np.arctan2(sin_ramc, denominator))
+    asc_lon = np.where(asc_lon < 0, asc_lon + 360, asc_lon)
+    return np.fmod(asc_lon, 360)
+
+def calculate_ascendant(d, lat, lon_deg):
+    return float(calculate_ascendant_batch(d, lat, lon_deg))
+
+def calculate_bodies(d, lat, lon, bodies):
+    """Longitudes of the named bodies for each row, shape (len(bodies), N)."""
+    d = np.atleast_1d(np.asarray(d, dtype=float))
+    lat = np.broadcast_to(np.asarray(lat, dtype=float), d.shape)
+    lon = np.broadcast_to(np.asarray(lon, dtype=float), d.shape)
+    out = np.empty((len(bodies), d.size))
+    rows = {body: k for k, body in enumerate(bodies)}
+    # The Sun also gives the Earth's position every planet is seen from.
+    if 'sun' in rows or any(p in rows for p in PLANETS):
+        with stage('ephemeris.sun'):
+            sun_lon, sun_lat, sun_r = calculate_sun_batch(d)
+            x_earth, y_earth, z_earth = calculate_earth_batch(sun_lon, sun_lat, sun_r)
+            mj, ms, mu, mn = calculate_mean_anomalies_batch(d)
+        if 'sun' in rows:
+            out[rows['sun']] = sun_lon
+    if 'moon' in rows:
+        with stage('ephemeris.moon'):
+            out[rows['moon']] = calculate_moon_batch(d)[0]
+    for p in PLANETS:
+        if p in rows:
+            with stage(KEPLER_STAGES[p]):
+                out[rows[p]] = calculate_planet_position_batch(d, p, x_earth, y_earth, z_earth, mj, ms, mu, mn)[0]
+    if 'ascendant' in rows:
+        with stage('ephemeris.ascendant'):
+            out[rows['ascendant']] = calculate_ascendant_batch(d, lat, lon)
+    if 'north_node' in rows:
+        with stage('ephemeris.north_node'):
+            out[rows['north_node']] = calculate_north_node_batch(d)
+    return out
+
+def calculate_positions(d, lat, lon):
+    """Longitudes of every body in BODIES for each row, shape (len(BODIES), N)."""
+    return calculate_bodies(d, lat, lon, BODIES)
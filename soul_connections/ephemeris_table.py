@@ -0,0 +1,143 @@
+import argparse
+import json
+import os
+import struct
+
+import numpy as np
+
+from soul_connections.ephemeris import (
+    BODIES, calculate_d, calculate_sun_batch, calculate_moon_batch, calculate_earth_batch,
+    calculate_mean_anomalies_batch, calculate_planet_position_batch, calculate_north_node_batch,
+    calculate_ascendant_batch, calculate_bodies, rev_batch,
+)
+from soul_connections.profiling import stage
+
+MAGIC = b'SCEPH1\x00\x00'
+ALIGN = 64
+TABLE_BODIES = [b for b in BODIES if b != 'ascendant']
+# Birth dates are limited to 1900-01-01..2100-12-31 local time; pad by a day on
+# each side so every timezone offset still lands inside the table.
+D_START = calculate_d(1900, 1, 1, 0) - 1
+D_END = calculate_d(2100, 12, 31, 0) + 2
+STEPS = [2.0 ** k for k in range(5, -6, -1)]
+DEFAULT_TOLERANCE = 0.001
+DEFAULT_PATH = os.path.join(os.path.dirname(__file__), 'data', 'ephemeris_1900_2100.bin')
+
+def wrap_diff(x):
+    return (x + 180.0) % 360.0 - 180.0
+
+def body_longitudes(body, d):
+    d = np.asarray(d, dtype=float)
+    if body == 'sun':
+        return calculate_sun_batch(d)[0]
+    if body == 'moon':
+        return calculate_moon_batch(d)[0]
+    if body == 'north_node':
+        return calculate_north_node_batch(d)
+    sun_lon, sun_lat, sun_r = calculate_sun_batch(d)
+    x_earth, y_earth, z_earth = calculate_earth_batch(sun_lon, sun_lat, sun_r)
+    mj, ms, mu, mn = calculate_mean_anomalies_batch(d)
+    return calculate_planet_position_batch(d, body, x_earth, y_earth, z_earth, mj, ms, mu, mn)[0]
+
+def choose_step(body, d_start=D_START, d_end=D_END, tolerance=DEFAULT_TOLERANCE):
+    # Largest step whose linear interpolation stays within tolerance at every
+    # midpoint of the range; midpoints are where the interpolation error peaks.
+    for step in STEPS:
+        grid = d_start + step * np.arange(int(np.ceil((d_end - d_start) / step)) + 1)
+        values = body_longitudes(body, grid)
+        mids = body_longitudes(body, grid[:-1] + step / 2)
+        interp = values[:-1] + wrap_diff(values[1:] - values[:-1]) / 2
+        error = np.abs(wrap_diff(interp - mids)).max()
+        if error <= tolerance:
+            return step, grid, values, float(error)
+    raise ValueError(f"no step in {STEPS} keeps {body} within {tolerance} degrees")
+
+def build_table(path=DEFAULT_PATH, d_start=D_START, d_end=D_END, tolerance=DEFAULT_TOLERANCE):
+    header = {'version': 1, 'dtype': '<f4', 'd_start': d_start, 'd_end': d_end, 'tolerance': tolerance, 'bodies': []}
+    columns = []
+    offset = 0
+    for body in TABLE_BODIES:
+        step, grid, values, error = choose_step(body, d_start, d_end, tolerance)
+        columns.append(values.astype('<f4'))
+        header['bodies'].append({'name': body, 'step': step, 'count': len(grid), 'offset': offset, 'max_error': error})
+        offset += len(grid)
+    blob = json.dumps(header).encode()
+    data_offset = -(-(len(MAGIC) + 4 + len(blob)) // ALIGN) * ALIGN
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<I', len(blob)))
+        f.write(blob)
+        f.write(b'\x00' * (data_offset - f.tell()))
+        for column in columns:
+            f.write(column.tobytes())
+    os.replace(tmp, path)
+    return header
+
+class EphemerisTable:
+    def __init__(self, path=DEFAULT_PATH):
+        with open(path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not an ephemeris table")
+            (length,) = struct.unpack('<I', f.read(4))
+            self.header = json.loads(f.read(length))
+        data_offset = -(-(len(MAGIC) + 4 + length) // ALIGN) * ALIGN
+        self.path = path
+        self.d_start = self.header['d_start']
+        self.d_end = self.header['d_end']
+        self.data = np.memmap(path, dtype=self.header['dtype'], mode='r', offset=data_offset)
+        self.columns = {}
+        for spec in self.header['bodies']:
+            column = self.data[spec['offset']:spec['offset'] + spec['count']]
+            self.columns[spec['name']] = (spec['step'], column)
+
+    def longitudes(self, body, d):
+        step, column = self.columns[body]
+        x = (np.asarray(d, dtype=float) - self.d_start) / step
+        i = np.clip(np.floor(x).astype(np.int64), 0, len(column) - 2)
+        f = x - i
+        v0 = column[i].astype(float)
+        v1 = column[i + 1].astype(float)
+        return rev_batch(v0 + f * wrap_diff(v1 - v0))
+
+    def positions(self, d, lat, lon):
+        return self.bodies(d, lat, lon, BODIES)
+
+    def bodies(self, d, lat, lon, bodies):
+        d = np.atleast_1d(np.asarray(d, dtype=float))
+        lat = np.broadcast_to(np.asarray(lat, dtype=float), d.shape)
+        lon = np.broadcast_to(np.asarray(lon, dtype=float), d.shape)
+        inside = (d >= self.d_start) & (d <= self.d_end)
+        if not inside.all():
+            out = calculate_bodies(d, lat, lon, bodies)
+            if inside.any():
+                out[:, inside] = self.bodies(d[inside], lat[inside], lon[inside], bodies)
+            return out
+        out = np.empty((len(bodies), d.size))
+        for k, body in enumerate(bodies):
+            if body == 'ascendant':
+                with stage('ephemeris.ascendant'):
+                    out[k] = calculate_ascendant_batch(d, lat, lon)
+            else:
+                with stage('ephemeris.table'):
+                    out[k] = self.longitudes(body, d)
+        return out
+
+def load_table(path=DEFAULT_PATH):
+    if not os.path.exists(path):
+        return None
+    return EphemerisTable(path)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the precomputed 1900-2100 ephemeris table.")
+    parser.add_argument('path', nargs='?', default=DEFAULT_PATH)
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE, help="max interpolation error in degrees")
+    args = parser.parse_args(argv)
+    header = build_table(args.path, tolerance=args.tolerance)
+    for spec in header['bodies']:
+        print(f"{spec['name']:<11} step {spec['step']:>8.5f} d  rows {spec['count']:>8}  max error {spec['max_error']:.6f}°")
+    print(f"wrote {args.path} ({os.path.getsize(args.path)} bytes)")
+
+if __name__ == '__main__':
+    main()
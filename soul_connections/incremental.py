@@ -0,0 +1,82 @@
+import numpy as np
+
+from soul_connections.astrology import aspect_list, synastry_codes
+from soul_connections.ephemeris import BODIES, calculate_bodies, calculate_positions
+from soul_connections.ephemeris_table import DEFAULT_TOLERANCE
+from soul_connections.numerology import calculate_life_path
+from soul_connections.search import MAX_SPEED
+
+# A body is reused after a time-only change while it cannot have moved more
+# than the interpolation error already accepted for the ephemeris table.
+REUSE_TOLERANCE = DEFAULT_TOLERANCE
+ASCENDANT = BODIES.index('ascendant')
+
+class IncrementalChart:
+    """One person's chart, recomputing only what an input change can affect.
+
+    A new birth date recomputes the life path and the whole chart.  On the
+    same date, a time change recomputes only the bodies that may have moved
+    more than `tolerance` degrees since they were last computed (judged by
+    search.MAX_SPEED), and a latitude/longitude change only the ascendant.
+    update() returns the indices into BODIES that changed.
+    """
+
+    def __init__(self, compute_chart=calculate_positions, compute_bodies=calculate_bodies, tolerance=REUSE_TOLERANCE):
+        self.compute_chart = compute_chart
+        self.compute_bodies = compute_bodies
+        self.tolerance = tolerance
+        self.date = None
+        self.d = self.lat = self.lon = None
+        self.life_path = None
+        self.lons = np.empty(len(BODIES))
+        # The d each body was last computed at, which bounds how far it may
+        # have drifted since.
+        self.computed_at = np.empty(len(BODIES))
+
+    def update(self, birth_date, d, lat, lon):
+        if birth_date != self.date:
+            self.date = birth_date
+            self.life_path = calculate_life_path(birth_date.day, birth_date.month, birth_date.year)
+            self.d, self.lat, self.lon = d, lat, lon
+            self.lons[:] = self.compute_chart([d], [lat], [lon])[:, 0]
+            self.computed_at[:] = d
+            return list(range(len(BODIES)))
+        stale = []
+        if d != self.d:
+            drift = np.abs(d - self.computed_at)
+            stale = [k for k, body in enumerate(BODIES) if body != 'ascendant' and MAX_SPEED[body] * drift[k] > self.tolerance]
+        if (d, lat, lon) != (self.d, self.lat, self.lon):
+            stale.append(ASCENDANT)
+        self.d, self.lat, self.lon = d, lat, lon
+        if stale:
+            self.lons[stale] = self.compute_bodies([d], [lat], [lon], [BODIES[k] for k in stale])[:, 0]
+            self.computed_at[stale] = d
+        return sorted(stale)
+
+    def positions(self):
+        return dict(zip(BODIES, self.lons.tolist()))
+
+class IncrementalMatch:
+    """Two IncrementalCharts plus their synastry matrix, where only the rows
+    (person 1) and columns (person 2) of changed bodies are recomputed."""
+
+    def __init__(self, compute_chart=calculate_positions, compute_bodies=calculate_bodies, orb=8, tolerance=REUSE_TOLERANCE):
+        self.charts = [IncrementalChart(compute_chart, compute_bodies, tolerance) for _ in range(2)]
+        self.orb = orb
+        self.diffs = np.empty((len(BODIES), len(BODIES)))
+        self.codes = np.zeros((len(BODIES), len(BODIES)), dtype=np.uint8)
+
+    def update(self, birth1, birth2):
+        """Apply (date, d, lat, lon) for both people; returns the changed body indices of each."""
+        rows = self.charts[0].update(*birth1)
+        cols = self.charts[1].update(*birth2)
+        lons1, lons2 = self.charts[0].lons, self.charts[1].lons
+        if rows:
+            self.diffs[rows], self.codes[rows] = synastry_codes(lons1[rows], lons2, self.orb)
+        if cols:
+            self.diffs[:, cols], self.codes[:, cols] = synastry_codes(lons1, lons2[cols], self.orb)
+        return rows, cols
+
+    def aspects(self):
+        """The synastry_aspects list for the current charts."""
+        return aspect_list(BODIES, BODIES, self.diffs, self.codes)
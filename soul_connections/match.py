@@ -0,0 +1,87 @@
+from collections import namedtuple
+from datetime import date, time
+
+import math
+
+import numpy as np
+
+from soul_connections.astrology import ASPECT_ANGLES, ASPECT_INDICATIONS, ASPECT_NAMES, ZODIAC_SIGNS, connection_type, synastry_codes
+from soul_connections.ephemeris import BODIES, calculate_d, calculate_positions
+from soul_connections.numerology import calculate_life_path, is_harmonious_life_path
+from soul_connections.profiling import stage
+from soul_connections.timezones import ut_hours, utc_offset
+
+BirthRecord = namedtuple('BirthRecord', ['date', 'time', 'tz', 'lat', 'lon'])
+
+DEFAULT_TIME = time(12, 0)
+DEFAULT_RECORD_TZ = "UTC (UTC+0:00)"
+SUN = BODIES.index('sun')
+NORTH_NODE = BODIES.index('north_node')
+
+def parse_birth(fields):
+    birth_date = fields['date']
+    if not isinstance(birth_date, date):
+        birth_date = date.fromisoformat(str(birth_date).strip())
+    birth_time = fields.get('time') or DEFAULT_TIME
+    if not isinstance(birth_time, time):
+        birth_time = time.fromisoformat(str(birth_time).strip())
+    tz = fields.get('tz') or DEFAULT_RECORD_TZ
+    # Resolving the offset here makes an unknown zone this record's parse
+    # error instead of a failure in the batch it later joins.
+    utc_offset(tz, birth_date, birth_time)
+    lat, lon = float(fields['lat']), float(fields['lon'])
+    if not (math.isfinite(lat) and math.isfinite(lon)):
+        raise ValueError(f"latitude and longitude must be finite, got {lat}, {lon}")
+    if not -90 <= lat <= 90:
+        raise ValueError(f"latitude must be within [-90, 90], got {lat}")
+    return BirthRecord(birth_date, birth_time, tz, lat, lon)
+
+def birth_d(birth):
+    ut = ut_hours(birth.date, birth.time, birth.tz)
+    return calculate_d(birth.date.year, birth.date.month, birth.date.day, ut)
+
+# Rounding to 1e-4 degrees keeps the output well below the model's own accuracy
+# and makes JSON encoding, the dominant cost of the batch CLI, much cheaper.
+PRECISION = 4
+
+def placements(lons):
+    lons = np.asarray(lons)
+    signs = (lons // 30).astype(int).tolist()
+    degrees = np.round(lons % 30, PRECISION).tolist()
+    return {body: {'sign': ZODIAC_SIGNS[sign], 'degree': degree} for body, sign, degree in zip(BODIES, signs, degrees)}
+
+def match_result(birth1, birth2, lons1, lons2, diffs, codes):
+    lp1 = calculate_life_path(birth1.date.day, birth1.date.month, birth1.date.year)
+    lp2 = calculate_life_path(birth2.date.day, birth2.date.month, birth2.date.year)
+    rows, cols = np.nonzero(codes)
+    aspects = []
+    for i, j, code, diff in zip(rows.tolist(), cols.tolist(), codes[rows, cols].tolist(), np.round(diffs[rows, cols], PRECISION).tolist()):
+        aspects.append({
+            'body1': BODIES[i],
+            'body2': BODIES[j],
+            'aspect': ASPECT_NAMES[code - 1],
+            'separation': diff,
+            'indication': ASPECT_INDICATIONS[ASPECT_ANGLES[code - 1]],
+        })
+    return {
+        'life_paths': [lp1, lp2],
+        'life_path_harmony': is_harmonious_life_path(lp1, lp2),
+        'placements': [placements(lons1), placements(lons2)],
+        'aspects': aspects,
+        'connection': connection_type(float(diffs[SUN, SUN])),
+        'north_node_bond': bool(diffs[NORTH_NODE, SUN] <= 10 or diffs[SUN, NORTH_NODE] <= 10),
+    }
+
+def match_batch(pairs, compute=calculate_positions, orb=8):
+    if not pairs:
+        return []
+    births = [birth for pair in pairs for birth in pair]
+    with stage('calculate_d'):
+        d = [birth_d(b) for b in births]
+    lons = compute(d, [b.lat for b in births], [b.lon for b in births])
+    lons1 = lons[:, 0::2].T
+    lons2 = lons[:, 1::2].T
+    with stage('synastry'):
+        diffs, codes = synastry_codes(lons1, lons2, orb)
+    with stage('results'):
+        return [match_result(b1, b2, lons1[k], lons2[k], diffs[k], codes[k]) for k, (b1, b2) in enumerate(pairs)]
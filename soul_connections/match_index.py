@@ -0,0 +1,133 @@
+import numpy as np
+
+from soul_connections.astrology import ASPECT_ANGLES, ASPECT_INDICATIONS
+from soul_connections.ephemeris import BODIES
+
+CONNECTION_WEIGHTS = {'twin_flame': 3.0, 'soulmate': 2.0, 'karmic': 1.0}
+INDICATION_CONNECTIONS = {
+    'intense mirror for twin flame': 'twin_flame',
+    'harmonious soulmate flow': 'soulmate',
+    'karmic challenge': 'karmic',
+}
+# Sun-Sun angles that make up each connection type in the inference section.
+SUN_CONNECTION_ANGLES = {'twin_flame': [180], 'soulmate': [0, 60, 120], 'karmic': [90]}
+SUN = BODIES.index('sun')
+
+def code_weights(weights=CONNECTION_WEIGHTS):
+    # Score contributed by each aspect code, with 0 (no aspect) scoring nothing.
+    return np.array([0.0] + [weights.get(INDICATION_CONNECTIONS[ASPECT_INDICATIONS[angle]], 0.0) for angle in ASPECT_ANGLES])
+
+class MatchIndex:
+    """Top-K compatibility queries over a stored population of charts.
+
+    positions is an (N, len(BODIES)) array of longitudes.  Every body column is
+    kept sorted, so the charts whose body lies inside an aspect's orb window are
+    a contiguous range found with two binary searches.
+    """
+
+    def __init__(self, positions, ids=None, orb=8, weights=CONNECTION_WEIGHTS):
+        if not 0 < orb < 15:
+            # Wider orbs make neighbouring aspect windows overlap, which
+            # get_aspect resolves by precedence but the range queries cannot.
+            raise ValueError("orb must be between 0 and 15 degrees")
+        self.positions = np.ascontiguousarray(positions, dtype=float)
+        self.ids = np.arange(len(self.positions)) if ids is None else np.asarray(ids)
+        self.orb = orb
+        self.weights = code_weights(weights)
+        self.order = np.argsort(self.positions, axis=0, kind='stable').T.copy()
+        self.sorted = np.take_along_axis(self.positions, self.order.T, axis=0).T.copy()
+
+    def __len__(self):
+        return len(self.positions)
+
+    def bounds(self, center, orb=None):
+        orb = self.orb if orb is None else orb
+        return (center - orb) % 360, (center + orb) % 360
+
+    def window(self, body, center, orb=None):
+        """Slices of the sorted body column within orb of center, split at 0/360."""
+        column = self.sorted[body]
+        lo, hi = self.bounds(center, orb)
+        if lo <= hi:
+            return [(np.searchsorted(column, lo, 'left'), np.searchsorted(column, hi, 'right'))]
+        return [(np.searchsorted(column, lo, 'left'), len(column)), (0, np.searchsorted(column, hi, 'right'))]
+
+    def centers(self, lon, angle):
+        return [lon + angle] if angle in (0, 180) else [lon + angle, lon - angle]
+
+    def windows(self, lon, angle, body):
+        return [s for center in self.centers(lon, angle) for s in self.window(body, center)]
+
+    def scores(self, lons):
+        """Compatibility score of lons against every stored chart."""
+        n = len(self)
+        scores = np.zeros(n)
+        for j in range(len(BODIES)):
+            # Accumulate window weights as +w/-w marks over the sorted column
+            # and integrate once, rather than touching each window's members.
+            marks = np.zeros(n + 1)
+            for lon in lons:
+                for code, angle in enumerate(ASPECT_ANGLES, start=1):
+                    for lo, hi in self.windows(lon, angle, j):
+                        marks[lo] += self.weights[code]
+                        marks[hi] -= self.weights[code]
+            scores[self.order[j]] += np.cumsum(marks[:-1])
+        return scores
+
+    def row_scores(self, lons, rows):
+        """scores() for the given rows only.
+
+        The aspect windows are the same for every body column, so a chart's
+        score is the total weight of the windows containing its longitudes.
+        Each window adds its weight from its start and takes it back just past
+        its end; a sorted prefix sum of those steps is read off per longitude.
+        """
+        steps, weights = [], []
+        for lon in lons:
+            for code, angle in enumerate(ASPECT_ANGLES, start=1):
+                for center in self.centers(lon, angle):
+                    lo, hi = self.bounds(center)
+                    for start, end in [(lo, hi)] if lo <= hi else [(lo, np.inf), (-np.inf, hi)]:
+                        steps += [start, np.nextafter(end, np.inf)]
+                        weights += [self.weights[code], -self.weights[code]]
+        steps, weights = np.array(steps), np.array(weights)
+        order = np.argsort(steps, kind='stable')
+        level = np.concatenate([[0.0], np.cumsum(weights[order])])
+        covered = level[np.searchsorted(steps[order], self.positions[rows], 'right')]
+        return covered.sum(axis=1)
+
+    def candidates(self, lons, connection):
+        """Rows whose Sun forms the given Sun-Sun connection with lons, in no
+        particular order (the orb limit keeps the windows disjoint)."""
+        rows = [self.order[SUN][lo:hi] for angle in SUN_CONNECTION_ANGLES[connection] for lo, hi in self.windows(lons[SUN], angle, SUN)]
+        return np.concatenate(rows) if rows else np.empty(0, dtype=np.int64)
+
+    def top_k(self, lons, k=10, connection=None, exclude=None):
+        """The k best (id, score) matches, ties broken by storage order.
+
+        Without connection every stored chart is scored, which costs
+        O(len(BODIES) * N) per query.  With connection set, only charts whose
+        Sun forms that connection with lons are eligible, and only those are
+        scored.
+        """
+        lons = np.asarray(lons, dtype=float)
+        if connection is None:
+            rows = np.arange(len(self))
+            scores = self.scores(lons)
+        else:
+            rows = self.candidates(lons, connection)
+            scores = self.row_scores(lons, rows)
+        if exclude is not None:
+            keep = ~np.isin(rows, exclude)
+            rows, scores = rows[keep], scores[keep]
+        if k < len(rows):
+            kth = np.partition(scores, len(rows) - k)[len(rows) - k]
+            above = np.nonzero(scores > kth)[0]
+            # Candidates come in Sun-longitude order, so take the tied rows
+            # by storage order explicitly.
+            tied = np.nonzero(scores == kth)[0]
+            tied = tied[np.argsort(rows[tied], kind='stable')][:k - len(above)]
+            picked = np.concatenate([above, tied])
+            rows, scores = rows[picked], scores[picked]
+        best = np.lexsort((rows, -scores))[:k]
+        return [(self.ids[r].item(), float(s)) for r, s in zip(rows[best], scores[best])]
@@ -0,0 +1,18 @@
+LIFE_PATH_MEANINGS = ['', 'Independence', 'Sensitivity', 'Creativity', 'Stability', 'Freedom', 'Harmony', 'Wisdom', 'Power', 'Humanitarianism']
+
+def calculate_life_path(day, month, year):
+    def reduce(num):
+        while num > 9 and num not in [11, 22, 33]:
+            num = sum(int(d) for d in str(num))
+        return num
+    day_red = reduce(day)
+    month_red = reduce(month)
+    year_red = reduce(year)
+    total = reduce(day_red + month_red + year_red)
+    return total
+
+def life_path_meaning(life_path):
+    return LIFE_PATH_MEANINGS[life_path % 9]
+
+def is_harmonious_life_path(lp1, lp2):
+    return lp1 == lp2 or abs(lp1 - lp2) in [2, 4]
@@ -0,0 +1,69 @@
+import os
+from concurrent.futures import FIRST_COMPLETED, CancelledError, ProcessPoolExecutor, wait
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from soul_connections.ephemeris import BODIES, calculate_positions
+from soul_connections.ephemeris_table import EphemerisTable
+
+DEFAULT_CHUNK_SIZE = 8192
+
+_worker_state = {}
+
+def _init_worker(name, n, table_path):
+    shm = shared_memory.SharedMemory(name=name)
+    inputs, out = shared_arrays(shm, n)
+    compute = EphemerisTable(table_path).positions if table_path else calculate_positions
+    _worker_state.update(shm=shm, inputs=inputs, out=out, compute=compute)
+
+def _run_chunk(i0, i1):
+    s = _worker_state
+    d, lat, lon = s['inputs'][:, i0:i1]
+    s['out'][i0:i1] = s['compute'](d, lat, lon).T
+    return i1 - i0
+
+def shared_arrays(shm, n):
+    # One block: the (3, n) d/lat/lon inputs followed by the (n, bodies) output.
+    inputs = np.ndarray((3, n), dtype=np.float64, buffer=shm.buf)
+    out = np.ndarray((n, len(BODIES)), dtype=np.float64, buffer=shm.buf, offset=inputs.nbytes)
+    return inputs, out
+
+def parallel_positions(d, lat, lon, workers=None, chunk_size=DEFAULT_CHUNK_SIZE, table=None, progress=None, cancel=None):
+    """calculate_positions over a process pool, as an (N, len(BODIES)) array.
+
+    Inputs and results live in one shared-memory block that every worker
+    attaches to, so only chunk bounds and row counts cross process
+    boundaries.  progress(done, total) is called in this process as chunks
+    finish; setting the cancel event (anything with is_set()) drops the
+    queued chunks and raises CancelledError.  table is an EphemerisTable
+    that each worker reopens from its file.
+    """
+    d, lat, lon = np.broadcast_arrays(*(np.atleast_1d(np.asarray(x, dtype=float)) for x in (d, lat, lon)))
+    n = len(d)
+    workers = workers or os.cpu_count() or 1
+    chunks = [(i0, min(i0 + chunk_size, n)) for i0 in range(0, n, chunk_size)]
+    shm = shared_memory.SharedMemory(create=True, size=max((3 + len(BODIES)) * n * 8, 1))
+    try:
+        inputs, out = shared_arrays(shm, n)
+        inputs[:] = d, lat, lon
+        initargs = (shm.name, n, table.path if table is not None else None)
+        with ProcessPoolExecutor(max_workers=min(workers, max(len(chunks), 1)), initializer=_init_worker, initargs=initargs) as pool:
+            pending = {pool.submit(_run_chunk, i0, i1) for i0, i1 in chunks}
+            done = 0
+            try:
+                while pending:
+                    finished, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        done += future.result()
+                    if finished and progress is not None:
+                        progress(done, n)
+                    if cancel is not None and cancel.is_set():
+                        raise CancelledError(f"cancelled after {done} of {n} charts")
+            finally:
+                for future in pending:
+                    future.cancel()
+        return out.copy()
+    finally:
+        shm.close()
+        shm.unlink()
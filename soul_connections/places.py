@@ -0,0 +1,70 @@
+import csv
+import os
+import unicodedata
+from bisect import bisect_left
+from collections import namedtuple
+from functools import lru_cache
+
+PLACES_PATH = os.path.join(os.path.dirname(__file__), 'places.csv')
+
+Place = namedtuple('Place', ['name', 'country', 'lat', 'lon', 'zone'])
+
+def normalize(text):
+    """Lowercase ASCII form used for matching: accents and punctuation dropped."""
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch)).casefold()
+    return ' '.join(''.join(ch if ch.isalnum() else ' ' for ch in text).split())
+
+def label(place):
+    return f"{place.name}, {place.country}"
+
+class PlaceIndex:
+    """Prefix index over place names and aliases.
+
+    Every word start of a name or alias ("rio de janeiro", "de janeiro",
+    "janeiro") becomes a key in one sorted list, so a prefix lookup is a
+    bisect plus a scan over the matching run.  Matches come back in file
+    order, which lists the more likely places first.
+    """
+
+    def __init__(self, places, aliases=None):
+        self.places = list(places)
+        entries = set()
+        for row, place in enumerate(self.places):
+            names = [place.name, *(aliases[row] if aliases else ())]
+            for name in names:
+                words = normalize(name).split()
+                for k in range(len(words)):
+                    entries.add((' '.join(words[k:]), row))
+        entries = sorted(entries)
+        self.keys = [key for key, _ in entries]
+        self.rows = [row for _, row in entries]
+
+    def __len__(self):
+        return len(self.places)
+
+    def search(self, prefix, limit=10):
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        rows = set()
+        i = bisect_left(self.keys, prefix)
+        while i < len(self.keys) and self.keys[i].startswith(prefix):
+            rows.add(self.rows[i])
+            i += 1
+        return [self.places[row] for row in sorted(rows)[:limit]]
+
+def read_places(path=PLACES_PATH):
+    places, aliases = [], []
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            places.append(Place(row['name'], row['country'], float(row['lat']), float(row['lon']), row['zone']))
+            aliases.append([alias for alias in row['aliases'].split('|') if alias])
+    return places, aliases
+
+@lru_cache(maxsize=None)
+def load_places(path=PLACES_PATH):
+    return PlaceIndex(*read_places(path))
+
+def search_places(prefix, limit=10):
+    return load_places().search(prefix, limit)
@@ -0,0 +1,134 @@
+import json
+import os
+import socket
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+
+# Upper bounds, in milliseconds, of the stage-duration histogram buckets; a
+# final bucket catches everything slower.
+BUCKETS_MS = [0.01, 0.03, 0.1, 0.3, 1, 3, 10, 30, 100, 300, 1000, 3000, 10000]
+
+_NOOP = nullcontext()
+
+def _noop_lap(name):
+    pass
+
+class Profiler:
+    """Per-stage wall-clock timings, counters and histograms.
+
+    stage(name) is a context manager; while the profiler is disabled it hands
+    back one shared no-op context, so instrumented code pays only for the
+    call.  Durations accumulate into cumulative histograms and into the
+    breakdown of the current run (start_run() begins a new one).  With a
+    parent, every duration and count is also added to the parent's totals,
+    but not to its run breakdown.
+    """
+
+    def __init__(self, enabled=False, parent=None):
+        self.enabled = enabled
+        self.parent = parent
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counters = {}
+            self.histograms = {}
+            self.last_run = {}
+
+    def stage(self, name):
+        if not self.enabled:
+            return _NOOP
+        return self._timed(name)
+
+    @contextmanager
+    def _timed(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def observe(self, name, seconds):
+        ms = seconds * 1000
+        with self._lock:
+            self._add(name, ms)
+            self.last_run[name] = self.last_run.get(name, 0.0) + ms
+        if self.parent is not None:
+            with self.parent._lock:
+                self.parent._add(name, ms)
+
+    def _add(self, name, ms):
+        hist = self.histograms.get(name)
+        if hist is None:
+            hist = self.histograms[name] = {'count': 0, 'sum_ms': 0.0, 'max_ms': 0.0, 'buckets': [0] * (len(BUCKETS_MS) + 1)}
+        hist['count'] += 1
+        hist['sum_ms'] += ms
+        hist['max_ms'] = max(hist['max_ms'], ms)
+        hist['buckets'][bisect_left(BUCKETS_MS, ms)] += 1
+
+    def count(self, name, n=1):
+        if self.enabled:
+            for profiler in (self, self.parent) if self.parent is not None else (self,):
+                with profiler._lock:
+                    profiler.counters[name] = profiler.counters.get(name, 0) + n
+
+    def start_run(self):
+        """Begin a new breakdown; returns a lap(name) callable that records the
+        time since the previous lap (or since start_run) as stage name."""
+        if not self.enabled:
+            return _noop_lap
+        with self._lock:
+            self.last_run = {}
+        self.count('runs')
+        last = [time.perf_counter()]
+
+        def lap(name):
+            now = time.perf_counter()
+            self.observe(name, now - last[0])
+            last[0] = now
+        return lap
+
+    def breakdown(self):
+        """(stage, milliseconds) of the current run, in the order stages first finished."""
+        with self._lock:
+            return list(self.last_run.items())
+
+    def records(self, **labels):
+        """One dict per counter and histogram, ready to be written as JSON lines.
+
+        Values are cumulative since the process started (or reset()), so the
+        latest record per host, pid and name is the current total.
+        """
+        base = {'timestamp': time.time(), 'host': socket.gethostname(), 'pid': os.getpid(), **labels}
+        with self._lock:
+            records = [{**base, 'type': 'counter', 'name': name, 'value': value} for name, value in self.counters.items()]
+            for name, hist in self.histograms.items():
+                records.append({**base, 'type': 'histogram', 'name': name, 'unit': 'ms', 'bounds': BUCKETS_MS, **hist, 'buckets': list(hist['buckets'])})
+        return records
+
+    def export_jsonl(self, path, **labels):
+        with open(path, 'a', encoding='utf-8') as f:
+            for record in self.records(**labels):
+                f.write(json.dumps(record))
+                f.write('\n')
+
+# Shared by every instrumented module; SOUL_PROFILE=1 turns it on at startup.
+PROFILER = Profiler(enabled=os.environ.get('SOUL_PROFILE', '') not in ('', '0'))
+_active = ContextVar('profiler', default=PROFILER)
+
+@contextmanager
+def use_profiler(profiler):
+    """Route stage() to profiler within this context (thread or task), e.g.
+    a per-session profiler whose parent is PROFILER."""
+    token = _active.set(profiler)
+    try:
+        yield profiler
+    finally:
+        _active.reset(token)
+
+def stage(name):
+    return _active.get().stage(name)
@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from soul_connections.astrology import separation
+from soul_connections.ephemeris import calculate_d
+from soul_connections.ephemeris_table import body_longitudes
+
+# Upper bounds on geocentric speed in degrees/day, a few percent above the
+# fastest this engine reaches over 1900-2100; the sampling step is chosen so a
+# body cannot cross a whole orb window between two samples.
+MAX_SPEED = {
+    'sun': 1.05, 'moon': 15.4, 'mercury': 2.3, 'venus': 1.3, 'mars': 0.85, 'jupiter': 0.26,
+    'saturn': 0.14, 'uranus': 0.07, 'neptune': 0.04, 'pluto': 0.04, 'north_node': 0.06,
+}
+D_EPOCH = datetime(1999, 12, 31)
+TOLERANCE = 1e-6  # days, about 0.1 s
+
+CONNECTIONS = {
+    'twin_flame': [('sun', 'sun', 180, 8)],
+    'soulmate': [('sun', 'sun', 0, 8), ('sun', 'sun', 60, 8), ('sun', 'sun', 120, 8)],
+    'karmic': [('sun', 'sun', 90, 8)],
+    'north_node': [('sun', 'north_node', 0, 10), ('north_node', 'sun', 0, 10)],
+}
+
+def d_to_datetime(d):
+    return D_EPOCH + timedelta(days=float(d))
+
+def date_range_d(start_date, end_date):
+    return calculate_d(start_date.year, start_date.month, start_date.day, 0), calculate_d(end_date.year, end_date.month, end_date.day, 24)
+
+def orb_margin(body, target_lon, angle, orb, d):
+    # Positive inside the orb, negative outside; continuous in d.
+    return orb - np.abs(separation(body_longitudes(body, d), target_lon) - angle)
+
+def find_aspect_intervals(body, target_lon, angle, orb, d_start, d_end, tolerance=TOLERANCE):
+    """Intervals (d0, d1) where body's longitude is within orb of angle from target_lon."""
+    step = min(orb / MAX_SPEED[body] / 4, d_end - d_start)
+    grid = np.append(np.arange(d_start, d_end, step), d_end)
+    inside = orb_margin(body, target_lon, angle, orb, grid) >= 0
+    crossings = np.nonzero(inside[1:] != inside[:-1])[0]
+    lo = grid[crossings]
+    hi = grid[crossings + 1]
+    lo_inside = inside[crossings]
+    while lo.size and (hi - lo).max() > tolerance:
+        mid = (lo + hi) / 2
+        mid_inside = orb_margin(body, target_lon, angle, orb, mid) >= 0
+        move_lo = mid_inside == lo_inside
+        lo = np.where(move_lo, mid, lo)
+        hi = np.where(move_lo, hi, mid)
+    edges = ((lo + hi) / 2).tolist()
+    entering = (~lo_inside).tolist()
+    intervals = []
+    start = d_start if inside[0] else None
+    for edge, enters in zip(edges, entering):
+        if enters:
+            start = edge
+        else:
+            intervals.append((start, edge))
+    if inside[-1]:
+        intervals.append((start, d_end))
+    return intervals
+
+def merge_intervals(intervals):
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(end, merged[-1][1]))
+        else:
+            merged.append((start, end))
+    return merged
+
+def find_connection_intervals(positions, connection, d_start, d_end, tolerance=TOLERANCE):
+    """Birth-moment intervals whose chart forms the given connection with positions.
+
+    Each rule is (candidate body, body in positions, angle, orb), matching the
+    Sun and North Node checks of the connection inference.
+    """
+    intervals = []
+    for body, target, angle, orb in CONNECTIONS[connection]:
+        intervals.extend(find_aspect_intervals(body, positions[target], angle, orb, d_start, d_end, tolerance))
+    return merge_intervals(intervals)
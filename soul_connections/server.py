@@ -0,0 +1,240 @@
+import asyncio
+import contextlib
+import json
+import signal
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http import HTTPStatus
+
+import numpy as np
+
+from soul_connections.ephemeris import calculate_positions
+from soul_connections.ephemeris_table import EphemerisTable
+from soul_connections.match import birth_d, match_batch, parse_birth
+
+DEFAULT_PORT = 8765
+MAX_BODY = 64 * 1024
+LATENCY_WINDOW = 10000
+
+_worker_state = {}
+
+def _init_worker(table_path):
+    _worker_state['compute'] = EphemerisTable(table_path).positions if table_path else calculate_positions
+
+def _run_batch(pairs):
+    return match_batch(pairs, _worker_state['compute'])
+
+def pair_from_body(body):
+    request = json.loads(body)
+    pair = parse_birth(request['person1']), parse_birth(request['person2'])
+    # Resolve the birth moments up front so a bad record is this request's
+    # 400 rather than an error for the whole batch it would join.
+    for birth in pair:
+        birth_d(birth)
+    return pair
+
+class Metrics:
+    def __init__(self, window=LATENCY_WINDOW):
+        self.latencies = deque(maxlen=window)
+        self.counts = {'requests': 0, 'ok': 0, 'rejected': 0, 'bad_request': 0, 'errors': 0, 'batches': 0, 'batched_pairs': 0, 'pool_restarts': 0}
+
+    def record(self, outcome, seconds):
+        self.counts['requests'] += 1
+        self.counts[outcome] += 1
+        if outcome == 'ok':
+            self.latencies.append(seconds)
+
+    def snapshot(self, queued=0, in_flight=0):
+        latencies = np.array(self.latencies) * 1000
+        p50, p99 = np.percentile(latencies, [50, 99]).tolist() if len(latencies) else (None, None)
+        batches = self.counts['batches']
+        return {
+            **self.counts,
+            'mean_batch_size': self.counts['batched_pairs'] / batches if batches else None,
+            'latency_ms': {'p50': p50, 'p99': p99, 'window': len(latencies)},
+            'queued': queued,
+            'batches_in_flight': in_flight,
+        }
+
+class MatchServer:
+    """Asyncio HTTP front end that micro-batches match requests onto a process pool.
+
+    POST /match takes {"person1": {...}, "person2": {...}} birth records (see
+    parse_birth) and returns the match_batch result.  Requests wait in a
+    bounded queue; a batcher takes up to batch_size of them, waiting at most
+    max_delay seconds for stragglers, and runs each batch on one of `workers`
+    processes; a batch that fails is rerun one request at a time so only
+    the failing request gets the error, and a pool whose worker died is
+    replaced.  When all workers are busy the queue fills and new requests
+    get 503 with Retry-After instead of piling up.  GET /metrics reports
+    counters and the p50/p99 latency of the last LATENCY_WINDOW answered
+    matches.
+    """
+
+    def __init__(self, workers=None, batch_size=64, max_delay=0.002, max_pending=1024, table=None):
+        self.workers = workers or 1
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self.max_pending = max_pending
+        self.table_path = table.path if table is not None else None
+        self.metrics = Metrics()
+        self.in_flight = 0
+        self.retries = set()
+
+    async def start(self, host='127.0.0.1', port=DEFAULT_PORT):
+        self.queue = asyncio.Queue(self.max_pending)
+        self.slots = asyncio.Semaphore(self.workers)
+        self.pool = self.new_pool()
+        self.batcher = asyncio.create_task(self.run_batches())
+        self.server = await asyncio.start_server(self.handle, host, port)
+        return self.server.sockets[0].getsockname()[:2]
+
+    def new_pool(self):
+        return ProcessPoolExecutor(self.workers, initializer=_init_worker, initargs=(self.table_path,))
+
+    def replace_pool(self, broken):
+        # Several batches can report the same dead pool; replace it once.
+        if broken is self.pool:
+            broken.shutdown(wait=False, cancel_futures=True)
+            self.pool = self.new_pool()
+            self.metrics.counts['pool_restarts'] += 1
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+        self.batcher.cancel()
+        self.pool.shutdown(cancel_futures=True)
+
+    async def run_batches(self):
+        while True:
+            batch = [await self.queue.get()]
+            if self.queue.qsize() < self.batch_size - 1:
+                await asyncio.sleep(self.max_delay)
+            while len(batch) < self.batch_size and self.queue.qsize():
+                batch.append(self.queue.get_nowait())
+            self.metrics.counts['batches'] += 1
+            self.metrics.counts['batched_pairs'] += len(batch)
+            await self.dispatch(batch)
+
+    async def dispatch(self, batch):
+        # Holding a slot before dispatching keeps at most `workers` batches
+        # in flight; everything else waits in the bounded queue.
+        await self.slots.acquire()
+        self.in_flight += 1
+        pool = self.pool
+        try:
+            future = asyncio.get_running_loop().run_in_executor(pool, _run_batch, [pair for pair, _ in batch])
+        except Exception as exc:
+            # A pool that broke between batches refuses new work right away;
+            # answer this batch with the error instead of wedging the batcher.
+            self.in_flight -= 1
+            self.slots.release()
+            if isinstance(exc, BrokenProcessPool):
+                self.replace_pool(pool)
+            self.fail(batch, exc)
+            return
+        future.add_done_callback(lambda done, batch=batch, pool=pool: self.finish_batch(done, batch, pool))
+
+    def fail(self, batch, error):
+        for _, waiter in batch:
+            if not waiter.done():
+                waiter.set_exception(error)
+
+    def finish_batch(self, done, batch, pool):
+        self.in_flight -= 1
+        self.slots.release()
+        error = asyncio.CancelledError() if done.cancelled() else done.exception()
+        if isinstance(error, BrokenProcessPool):
+            self.replace_pool(pool)
+        if error is not None and len(batch) > 1:
+            # Rerun a failed batch one pair at a time so only the request
+            # that broke it gets the error.
+            for item in batch:
+                retry = asyncio.ensure_future(self.dispatch([item]))
+                self.retries.add(retry)
+                retry.add_done_callback(self.retries.discard)
+            return
+        if error is not None:
+            self.fail(batch, error)
+            return
+        for (_, waiter), result in zip(batch, done.result()):
+            if not waiter.done():
+                waiter.set_result(result)
+
+    async def submit(self, pair):
+        waiter = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((pair, waiter))
+        return await waiter
+
+    async def route(self, method, path, body):
+        if method == 'GET' and path == '/health':
+            return HTTPStatus.OK, {'status': 'ok'}, None
+        if method == 'GET' and path == '/metrics':
+            return HTTPStatus.OK, self.metrics.snapshot(self.queue.qsize(), self.in_flight), None
+        if path != '/match':
+            return HTTPStatus.NOT_FOUND, {'error': f"no route for {path}"}, None
+        if method != 'POST':
+            return HTTPStatus.METHOD_NOT_ALLOWED, {'error': "use POST"}, None
+        try:
+            pair = pair_from_body(body)
+        except (KeyError, TypeError, ValueError) as exc:
+            return HTTPStatus.BAD_REQUEST, {'error': f"{type(exc).__name__}: {exc}"}, 'bad_request'
+        try:
+            return HTTPStatus.OK, await self.submit(pair), 'ok'
+        except asyncio.QueueFull:
+            return HTTPStatus.SERVICE_UNAVAILABLE, {'error': "server busy, retry later"}, 'rejected'
+        except Exception as exc:
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {'error': f"{type(exc).__name__}: {exc}"}, 'errors'
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                started = time.perf_counter()
+                method, path, version = request_line.decode('latin-1').split()
+                headers = {}
+                while (line := await reader.readline()) not in (b'\r\n', b'\n', b''):
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get('content-length', 0))
+                if length > MAX_BODY:
+                    status, payload, outcome = HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {'error': "request body too large"}, 'bad_request'
+                    keep_alive = False
+                else:
+                    body = await reader.readexactly(length)
+                    status, payload, outcome = await self.route(method, path.split('?')[0], body)
+                    keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+                data = json.dumps(payload, ensure_ascii=False).encode()
+                head = [f'HTTP/1.1 {status.value} {status.phrase}', 'Content-Type: application/json', f'Content-Length: {len(data)}']
+                if status == HTTPStatus.SERVICE_UNAVAILABLE:
+                    head.append('Retry-After: 1')
+                head.append('Connection: keep-alive' if keep_alive else 'Connection: close')
+                writer.write(('\r\n'.join(head) + '\r\n\r\n').encode() + data)
+                await writer.drain()
+                if outcome:
+                    self.metrics.record(outcome, time.perf_counter() - started)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+async def serve(host='127.0.0.1', port=DEFAULT_PORT, **options):
+    server = MatchServer(**options)
+    host, port = await server.start(host, port)
+    print(f"serving soul connection matches on http://{host}:{port}", flush=True)
+    # Shut the pool down on SIGINT/SIGTERM so no worker outlives the server.
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        with contextlib.suppress(NotImplementedError):
+            loop.add_signal_handler(sig, stopping.set)
+    try:
+        await stopping.wait()
+    finally:
+        await server.stop()
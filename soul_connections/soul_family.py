@@ -0,0 +1,189 @@
+import numpy as np
+
+from soul_connections.astrology import separation
+from soul_connections.ephemeris import BODIES
+
+SUN = BODIES.index('sun')
+NORTH_NODE = BODIES.index('north_node')
+LIFE_PATH_STEPS = [0, 2, 4]
+SELF_WEIGHT = 0.1
+
+def link_windows(orb=8, node_orb=10):
+    # (proposer column, candidate column, angle, orb): Sun trines and sextiles
+    # on either side, and North Node-Sun conjunctions in both directions.
+    sun_links = [(SUN, SUN, angle, orb) for angle in (60, -60, 120, -120)]
+    return sun_links + [(NORTH_NODE, SUN, 0, node_orb), (SUN, NORTH_NODE, 0, node_orb)]
+
+def turn_mask(ids, step):
+    mixed = (np.asarray(ids, dtype=np.uint64) + np.uint64(step) * np.uint64(0x9E3779B9)) * np.uint64(0xBF58476D1CE4E5B9)
+    return (mixed >> np.uint64(40)) & np.uint64(1) == 0
+
+def edge_slots(indptr, rows):
+    # Positions of every edge of rows in a CSR edge list.
+    counts = indptr[rows + 1] - indptr[rows]
+    return np.arange(counts.sum()) + np.repeat(indptr[rows] + counts - np.cumsum(counts), counts)
+
+class SoulFamilyGraph:
+    """Harmonious-link graph over a population and its soul-family communities.
+
+    Two users are linked when their life paths match or differ by 2 or 4 and
+    their Suns are in trine/sextile, or one's North Node is conjunct the
+    other's Sun, within the usual orbs.  Users are bucketed by life path and
+    sorted by longitude, so each user only inspects the `neighbours` closest
+    charts on either side of each aspect point in each harmonious bucket and
+    keeps its `max_links` tightest links.  Building the graph is therefore
+    linear in the population and never enumerates all pairs.
+
+    Communities come from weighted label propagation with deterministic tie
+    breaking, so results depend only on the users and the order they were
+    added.  add() only proposes links for the new users and resumes
+    propagation from the previous labels, re-evaluating only the users whose
+    neighbourhood changed.
+    """
+
+    def __init__(self, neighbours=4, max_links=16, orb=8, node_orb=10, max_iter=50, chunk_size=10000):
+        self.neighbours = neighbours
+        self.max_links = max_links
+        self.windows = link_windows(orb, node_orb)
+        self.max_iter = max_iter
+        self.chunk_size = chunk_size
+        self.positions = np.empty((0, len(BODIES)))
+        self.life_paths = np.empty(0, dtype=np.int64)
+        self.edges = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0))
+        self.labels = np.empty(0, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.life_paths)
+
+    def add(self, positions, life_paths):
+        """Add users and update the communities; returns the new users' ids."""
+        start = len(self)
+        self.positions = np.concatenate([self.positions, np.asarray(positions, dtype=float).reshape(-1, len(BODIES))])
+        self.life_paths = np.concatenate([self.life_paths, np.asarray(life_paths, dtype=np.int64)])
+        new = np.arange(start, len(self))
+        self.buckets = self.build_buckets()
+        touched = [new]
+        for chunk in range(0, len(new), self.chunk_size):
+            u, v, w = self.propose(new[chunk:chunk + self.chunk_size])
+            self.merge_edges(u, v, w)
+            touched.append(v)
+        # Existing users keep their labels; only the new users and the users
+        # they linked to start out active.
+        self.labels = self.propagate(np.concatenate([self.labels, new]), np.unique(np.concatenate(touched)))
+        return new
+
+    def build_buckets(self):
+        buckets = {}
+        for life_path in np.unique(self.life_paths).tolist():
+            members = np.nonzero(self.life_paths == life_path)[0]
+            columns = {}
+            for column in (SUN, NORTH_NODE):
+                order = np.argsort(self.positions[members, column], kind='stable')
+                columns[column] = (self.positions[members[order], column], members[order])
+            buckets[life_path] = columns
+        return buckets
+
+    def propose(self, users):
+        us, vs, ws = [], [], []
+        for life_path in np.unique(self.life_paths[users]).tolist():
+            group = users[self.life_paths[users] == life_path]
+            buckets = [columns for other, columns in self.buckets.items() if abs(other - life_path) in LIFE_PATH_STEPS]
+            u, v, w = self.propose_group(group, buckets)
+            us.append(u)
+            vs.append(v)
+            ws.append(w)
+        if not us:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0)
+        return np.concatenate(us), np.concatenate(vs), np.concatenate(ws)
+
+    def propose_group(self, users, buckets):
+        # One row of candidate slots per proposer: every harmonious bucket and
+        # window contributes 2 * neighbours columns, unused slots keep w = -inf.
+        offsets = np.arange(-self.neighbours, self.neighbours)
+        vs, ws = [], []
+        for columns in buckets:
+            for source, target, angle, orb in self.windows:
+                values, members = columns[target]
+                centers = (self.positions[users, source] + angle) % 360
+                at = np.searchsorted(values, centers)
+                idx = (at[:, None] + offsets[None, :]) % len(values)
+                deviation = separation(values[idx], centers[:, None])
+                v = members[idx]
+                vs.append(v)
+                ws.append(np.where((deviation <= orb) & (v != users[:, None]), 1 - deviation / orb, -np.inf))
+        v, w = np.hstack(vs), np.hstack(ws)
+        # Small buckets can offer the same candidate twice; keep the stronger.
+        order = np.argsort(np.where(w > -np.inf, v * 2.0 - w, np.inf), axis=1)
+        v, w = np.take_along_axis(v, order, 1), np.take_along_axis(w, order, 1)
+        w[:, 1:][v[:, 1:] == v[:, :-1]] = -np.inf
+        # Keep each proposer's max_links strongest links, ties to the lowest id.
+        order = np.argsort(-w, axis=1, kind='stable')[:, :self.max_links]
+        v, w = np.take_along_axis(v, order, 1), np.take_along_axis(w, order, 1)
+        u = np.broadcast_to(users[:, None], v.shape)
+        keep = w > -np.inf
+        return u[keep], v[keep], w[keep]
+
+    def merge_edges(self, u, v, w):
+        eu, ev, ew = self.edges
+        a = np.concatenate([eu, np.minimum(u, v)])
+        b = np.concatenate([ev, np.maximum(u, v)])
+        w = np.concatenate([ew, w])
+        # The same pair can be proposed from both ends or through two windows;
+        # keep its strongest link.
+        order = np.lexsort((-w, b, a))
+        a, b, w = a[order], b[order], w[order]
+        first = np.ones(len(a), dtype=bool)
+        first[1:] = (a[1:] != a[:-1]) | (b[1:] != b[:-1])
+        self.edges = (a[first], b[first], w[first])
+
+    def propagate(self, labels, active=None):
+        n = len(self)
+        eu, ev, ew = self.edges
+        nodes = np.arange(n)
+        # Every node also casts a small vote for its own label, which damps the
+        # oscillation of updates without pinning isolated labels.
+        src = np.concatenate([eu, ev, nodes])
+        order = np.argsort(src, kind='stable')
+        src = src[order]
+        dst = np.concatenate([ev, eu, nodes])[order]
+        weight = np.concatenate([ew, ew, np.full(n, SELF_WEIGHT)])[order]
+        indptr = np.searchsorted(src, np.arange(n + 1))
+        active = nodes if active is None else np.asarray(active, dtype=np.int64)
+        for step in range(2 * self.max_iter):
+            # Only nodes whose neighbourhood changed are re-evaluated.
+            if not len(active):
+                break
+            slots = edge_slots(indptr, active)
+            keys, inverse = np.unique(src[slots] * n + labels[dst[slots]], return_inverse=True)
+            totals = np.bincount(inverse.ravel(), weights=weight[slots])
+            key_src, key_label = keys // n, keys % n
+            # Keys are sorted by node then label, so the first key reaching its
+            # node's best total is the heaviest label with the lowest id.
+            new_node = np.r_[True, key_src[1:] != key_src[:-1]]
+            best = np.maximum.reduceat(totals, np.flatnonzero(new_node))
+            winners = np.flatnonzero(totals == best[np.cumsum(new_node) - 1])
+            winners = winners[np.r_[True, key_src[winners][1:] != key_src[winners][:-1]]]
+            # A node only moves when another label strictly outweighs its own,
+            # and only about half the nodes move per step, picked by a fixed
+            # hash of (id, step), so linked nodes cannot keep swapping labels.
+            current = np.searchsorted(keys, key_src[winners] * n + labels[key_src[winners]])
+            winners = winners[totals[winners] > totals[current]]
+            if not len(winners):
+                break
+            turn = winners[turn_mask(key_src[winners], step)]
+            moved = key_src[turn]
+            labels = labels.copy()
+            labels[moved] = key_label[turn]
+            active = np.union1d(key_src[winners], dst[edge_slots(indptr, moved)])
+        # Name each community after its lowest member id.
+        canonical = np.full(n, n)
+        np.minimum.at(canonical, labels, nodes)
+        return canonical[labels]
+
+    def families(self, min_size=2):
+        """Member ids of each community with at least min_size users, largest first."""
+        order = np.argsort(self.labels, kind='stable')
+        labels = self.labels[order]
+        bounds = np.flatnonzero(np.diff(labels)) + 1
+        groups = [group for group in np.split(order, bounds) if len(group) >= min_size]
+        return sorted(groups, key=lambda group: (-len(group), group[0]))
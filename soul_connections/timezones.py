@@ -0,0 +1,100 @@
+import io
+import os
+import re
+import zipfile
+from datetime import datetime
+from functools import lru_cache
+from zoneinfo import TZPATH, ZoneInfo, ZoneInfoNotFoundError
+
+# TZif rules of every zone in places.csv, so resolving a bundled place needs
+# no system tz database; see build_zone_bundle().
+ZONES_PATH = os.path.join(os.path.dirname(__file__), 'zones.zip')
+
+DEFAULT_TZ = "IST (UTC+5:30)"
+
+TZ_OPTIONS = [
+    "UTC (UTC+0:00)",
+    "IST (UTC+5:30)",
+    "EST (UTC-5:00)",
+    "CST (UTC-6:00)",
+    "PST (UTC-8:00)",
+    "MST (UTC-7:00)",
+    "CET (UTC+1:00)",
+    "EET (UTC+2:00)",
+    "MSK (UTC+3:00)",
+    "GST (UTC+4:00)",
+    "PKT (UTC+5:00)",
+    "BST (UTC+6:00)",
+    "ICT (UTC+7:00)",
+    "CST (UTC+8:00)",  # China
+    "JST (UTC+9:00)",
+    "AEST (UTC+10:00)",
+    "BRT (UTC-3:00)",
+    "AST (UTC-4:00)",
+    "AKST (UTC-9:00)",
+    "HST (UTC-10:00)"
+]
+
+# "<label> (UTC+h:mm)" with an explicit sign; minutes are optional.
+FIXED_OFFSET = re.compile(r'\(UTC([+-])(\d{1,2})(?::([0-5]\d))?\)\s*$')
+
+def parse_tz_offset(tz_str):
+    match = FIXED_OFFSET.search(tz_str)
+    if match is None or int(match[2]) > 14:
+        raise ValueError(f"malformed UTC offset {tz_str!r}, expected e.g. {DEFAULT_TZ!r}")
+    sign = 1 if match[1] == '+' else -1
+    return sign * (int(match[2]) + int(match[3] or 0) / 60)
+
+# Only the fixed options are kept parsed; free-form strings from records are
+# parsed on each call so they cannot grow a cache.
+TZ_OFFSETS = {tz: parse_tz_offset(tz) for tz in TZ_OPTIONS}
+
+def get_tz_offset(tz_str):
+    if tz_str in TZ_OFFSETS:
+        return TZ_OFFSETS[tz_str]
+    if '(' not in tz_str:
+        return 0.0
+    return parse_tz_offset(tz_str)
+
+@lru_cache(maxsize=None)
+def bundled_zones(path=ZONES_PATH):
+    with zipfile.ZipFile(path) as bundle:
+        return {name: bundle.read(name) for name in bundle.namelist()}
+
+@lru_cache(maxsize=None)
+def zone_info(zone):
+    """ZoneInfo for an IANA zone from the bundled rules, falling back to the
+    system tz database (or the tzdata package) for zones not bundled."""
+    data = bundled_zones().get(zone)
+    if data is not None:
+        return ZoneInfo.from_file(io.BytesIO(data), key=zone)
+    try:
+        return ZoneInfo(zone)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"unknown time zone {zone!r}") from None
+
+@lru_cache(maxsize=4096)
+def zone_offset(zone, local_datetime):
+    """UTC offset in hours of a naive local datetime in IANA zone, with the
+    DST and historical rules of the tz database.  Ambiguous or skipped local
+    times resolve to the offset in force before the transition."""
+    return local_datetime.replace(tzinfo=zone_info(zone)).utcoffset().total_seconds() / 3600
+
+def build_zone_bundle(zones, source=None, path=ZONES_PATH):
+    """Write the TZif files of zones from a zoneinfo directory (default: the
+    first of zoneinfo.TZPATH) into the bundle, e.g. for the zones of
+    places.csv from an unpacked tzdata wheel's tzdata/zoneinfo."""
+    source = source or next(p for p in TZPATH if os.path.isdir(p))
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as bundle:
+        for zone in sorted(set(zones)):
+            bundle.write(os.path.join(source, *zone.split('/')), zone)
+
+def utc_offset(tz, local_date, local_time):
+    """Offset in hours for either a fixed "(UTC+h:mm)" option or an IANA zone."""
+    if '(' in tz:
+        return get_tz_offset(tz)
+    return zone_offset(tz, datetime.combine(local_date, local_time))
+
+def ut_hours(local_date, local_time, tz):
+    """Universal time of day, in hours, as calculate_d expects it."""
+    return local_time.hour + local_time.minute / 60 - utc_offset(tz, local_date, local_time)